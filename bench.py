@@ -0,0 +1,326 @@
+# bench.py
+"""
+Benchmarks del pipeline (decode, giro, detección, recorte, exportación) sobre fotos sintéticas
+de documentos con cuadrilátero conocido. Sin display: corre en cualquier Linux con las dependencias.
+Cada etapa se mide en un proceso nuevo, así el pico de memoria (ru_maxrss) es solo suyo.
+
+Ejemplos:
+    python bench.py -o base.json                       # 2, 12 y 40 MP
+    python bench.py --sizes 2 --repeat 3 -o nuevo.json
+    python bench.py --compare base.json nuevo.json     # sale con 1 si alguna etapa empeora
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+SIZES_MP = (2, 12, 40)
+GROUP_PAGES = 4     # Páginas del grupo en la exportación end-to-end
+REGRESSION = 1.10   # Mediana nueva / base a partir de la cual --compare avisa
+
+
+# --- Datos sintéticos ---
+def synth_document(megapixels: float, seed: int):
+    """
+    Foto 4:3 de una hoja con líneas de "texto" sobre un fondo con textura, en perspectiva.
+    Devuelve (imagen BGR, esquinas TL, TR, BR, BL normalizadas 0-1).
+    """
+    import cv2
+    import numpy as np
+    from core.image_processor import order_points
+
+    rng = np.random.default_rng(seed)
+    height = int(round((megapixels * 1e6 * 3 / 4) ** 0.5))
+    width = int(round(height * 4 / 3))
+
+    # Fondo: degradado de mesa con ruido de baja frecuencia
+    small = rng.integers(40, 120, size=(height // 64 + 2, width // 64 + 2, 3), dtype=np.uint8)
+    photo = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    # Hoja A4 con renglones oscuros
+    page_h = int(height * 0.8)
+    page_w = int(page_h / 1.414)
+    page = np.full((page_h, page_w, 3), 235, dtype=np.uint8)
+    margin = page_w // 10
+    line_h = max(2, page_h // 80)
+    for y in range(margin, page_h - margin, line_h * 3):
+        length = int(rng.uniform(0.4, 1.0) * (page_w - 2 * margin))
+        page[y:y + line_h, margin:margin + length] = 30
+
+    # Perspectiva: esquinas del rectángulo centrado desplazadas hasta un 6% del lado
+    cx, cy = width / 2, height / 2
+    base = np.array([[cx - page_w / 2, cy - page_h / 2], [cx + page_w / 2, cy - page_h / 2],
+                     [cx + page_w / 2, cy + page_h / 2], [cx - page_w / 2, cy + page_h / 2]], dtype="float32")
+    jitter = rng.uniform(-0.06, 0.06, size=(4, 2)) * np.array([page_w, page_h])
+    quad = order_points((base + jitter).astype("float32"))
+    src = np.array([[0, 0], [page_w - 1, 0], [page_w - 1, page_h - 1], [0, page_h - 1]], dtype="float32")
+    matrix = cv2.getPerspectiveTransform(src, quad)
+    warped = cv2.warpPerspective(page, matrix, (width, height))
+    mask = cv2.warpPerspective(np.full((page_h, page_w), 255, np.uint8), matrix, (width, height))
+    photo[mask > 0] = warped[mask > 0]
+    del warped, mask
+
+    noise = rng.normal(0, 4, size=photo.shape).astype(np.int16)
+    photo = np.clip(photo.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return photo, (quad / np.array([width, height], dtype="float32")).tolist()
+
+
+def generate_cases(sizes, data_dir: str, seed: int, group_pages: int) -> list[dict]:
+    """Escribe los JPEG de cada resolución (reutiliza los que ya existan) y su cuadrilátero real."""
+    import cv2
+    os.makedirs(data_dir, exist_ok=True)
+    cases = []
+    for mp in sizes:
+        pages = []
+        for i in range(group_pages):
+            path = os.path.join(data_dir, f"synth_{mp}mp_s{seed}_{i}.jpg")
+            meta = path + ".json"
+            if not (os.path.exists(path) and os.path.exists(meta)):
+                photo, quad = synth_document(mp, seed * 1000 + int(mp * 10) + i)
+                cv2.imwrite(path, photo, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                with open(meta, "w") as f:
+                    json.dump({'quad': quad}, f)
+            with open(meta) as f:
+                pages.append({'path': path, 'quad': json.load(f)['quad']})
+        cases.append({'mp': mp, 'pages': pages})
+    return cases
+
+
+# --- Etapas: setup(case, out_dir) -> estado (no cronometrado), run(estado) -> extra o None ---
+def _fresh_editor():
+    from core.image_cache import ImageCache
+    from core.image_editor import ImageEditor
+    return ImageEditor(cache=ImageCache(), previews=ImageCache())  # Sin aciertos de otras repeticiones
+
+
+def _setup_path(case, out_dir):
+    return case['pages'][0]['path']
+
+
+def _run_decode(path):
+    from PyQt6.QtGui import QImage
+    if QImage(path).isNull():
+        raise RuntimeError(f"No se pudo decodificar {path}")
+
+
+def _setup_image(case, out_dir):
+    from PyQt6.QtGui import QImage
+    return QImage(case['pages'][0]['path'])
+
+
+def _run_rotate90(image):
+    from core.image_editor import rotate_image
+    rotate_image(image, 90)
+
+
+def _run_rotate_free(image):
+    from core.image_editor import rotate_image
+    rotate_image(image, 3)
+
+
+def _setup_detect(case, out_dir):
+    return _fresh_editor(), case['pages'][0]
+
+
+def _run_detect(state):
+    import numpy as np
+    from core.image_processor import order_points
+    editor, page = state
+    detection = editor.detect_document(page['path'])
+    if detection is None:
+        return {'corner_error': None}
+    # Error de esquina normalizado por la diagonal de la imagen
+    w, h = editor.source_size(page['path'])
+    found = order_points(np.array(detection['quad'], dtype="float32"))
+    diff = (found - np.array(page['quad'])) * np.array([w, h])
+    return {'corner_error': float(np.linalg.norm(diff, axis=1).max() / np.hypot(w, h))}
+
+
+def _setup_crop(case, out_dir):
+    import numpy as np
+    from core.image_processor import quad_size
+    editor = _fresh_editor()
+    page = case['pages'][0]
+    pts = np.array(page['quad'], dtype="float32") * np.array(editor.source_size(page['path']), dtype="float32")
+    editor.set_edits(page['path'], (('quad', tuple(map(tuple, pts.tolist())), quad_size(pts)),))
+    return editor, page['path']
+
+
+def _run_crop(state):
+    editor, path = state
+    editor.get_current_image(path)
+
+
+def _setup_export(case, out_dir):
+    from core.pdf_exporter import PDFExporter
+    return _fresh_editor(), PDFExporter(), case, os.path.join(out_dir, f"bench_{case['mp']}mp.pdf")
+
+
+def _run_export_passthrough(state):
+    editor, exporter, case, out = state
+    exporter.export_image_to_pdf(exporter.page_for(editor, case['pages'][0]['path']), out)
+
+
+def _run_export_single(state):
+    """End-to-end de una página: detectar, recortar, recodificar y escribir el PDF."""
+    editor, exporter, case, out = state
+    path = case['pages'][0]['path']
+    editor.auto_crop(path)
+    exporter.export_image_to_pdf(exporter.page_for(editor, path), out)
+
+
+def _run_export_group(state):
+    editor, exporter, case, out = state
+    paths = [page['path'] for page in case['pages']]
+    editor.detect_documents(paths)  # En lote, como el recorte de la GUI
+    for path in paths:
+        editor.auto_crop(path)
+    exporter.export_images_to_pdf((exporter.page_for(editor, p) for p in paths), out)
+
+
+STAGES = {
+    'decode': (_setup_path, _run_decode),
+    'rotate90': (_setup_image, _run_rotate90),
+    'rotate_free': (_setup_image, _run_rotate_free),
+    'detect': (_setup_detect, _run_detect),
+    'crop': (_setup_crop, _run_crop),
+    'export_passthrough': (_setup_export, _run_export_passthrough),
+    'export_single': (_setup_export, _run_export_single),
+    'export_group': (_setup_export, _run_export_group),
+}
+
+
+def _maxrss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB en Linux
+
+
+def run_stage(name: str, case: dict, repeat: int, out_dir: str) -> dict:
+    """Se ejecuta en un proceso nuevo: repite la etapa y devuelve tiempos y pico de memoria."""
+    import importlib
+    from core.startup import HEAVY_MODULES
+    for module in HEAVY_MODULES:
+        importlib.import_module(module)  # Los módulos se cargan al primer uso: que no cuente en la etapa
+    setup, run = STAGES[name]
+    times, extra = [], None
+    base_rss = None
+    for _ in range(repeat):
+        state = setup(case, out_dir)
+        if base_rss is None:
+            base_rss = _maxrss_mb()  # Tras el primer setup: cuenta solo lo que añade la etapa
+        start = time.perf_counter()
+        extra = run(state)
+        times.append(time.perf_counter() - start)
+        del state
+    times.sort()
+    peak = _maxrss_mb()
+    result = {
+        'stage': name, 'mp': case['mp'], 'repeat': repeat,
+        'times': times, 'min': times[0], 'median': statistics.median(times),
+        'peak_rss_mb': round(peak, 1), 'stage_peak_mb': round(peak - base_rss, 1),
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def _metadata() -> dict:
+    import cv2
+    import numpy
+    import reportlab
+    from PyQt6.QtCore import QT_VERSION_STR
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit, 'python': platform.python_version(), 'platform': platform.platform(),
+        'cpus': os.cpu_count(), 'qt': QT_VERSION_STR, 'opencv': cv2.__version__,
+        'numpy': numpy.__version__, 'reportlab': reportlab.Version,
+        'date': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(base_file: str, new_file: str, threshold: float = REGRESSION) -> int:
+    """Tabla de medianas nueva/base por etapa y resolución. Devuelve 1 si alguna supera threshold."""
+    with open(base_file) as f:
+        base = {(r['stage'], r['mp']): r for r in json.load(f)['results']}
+    with open(new_file) as f:
+        new = json.load(f)['results']
+    worse = 0
+    print(f"{'etapa':<20}{'MP':>4}{'base s':>10}{'nuevo s':>10}{'ratio':>8}{'mem MB':>10}")
+    for r in new:
+        old = base.get((r['stage'], r['mp']))
+        if old is None:
+            continue
+        ratio = r['median'] / old['median'] if old['median'] else float('inf')
+        mark = "  <-- más lento" if ratio > threshold else ""
+        worse += ratio > threshold
+        print(f"{r['stage']:<20}{r['mp']:>4}{old['median']:>10.4f}{r['median']:>10.4f}{ratio:>8.2f}"
+              f"{r['stage_peak_mb'] - old['stage_peak_mb']:>+10.1f}{mark}")
+    return 1 if worse else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline con documentos sintéticos.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES_MP)), help="Megapíxeles separados por comas")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Etapas a medir, separadas por comas")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por etapa")
+    parser.add_argument("--group-pages", type=int, default=GROUP_PAGES, help="Páginas de export_group")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los documentos sintéticos")
+    parser.add_argument("--data", help="Carpeta para los JPEG sintéticos (se reutilizan entre corridas)")
+    parser.add_argument("-o", "--output", help="Archivo JSON de resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NUEVO"), help="Comparar dos archivos de resultados")
+    parser.add_argument("--threshold", type=float, default=REGRESSION, help="Ratio de mediana que cuenta como regresión")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.compare:
+        return compare(*args.compare, threshold=args.threshold)
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"Etapas desconocidas: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    sizes = [float(s) if "." in s else int(s) for s in args.sizes.split(",") if s]
+    data_dir = args.data or os.path.join(tempfile.gettempdir(), "gestor-bench")
+    # También en otro proceso: Linux conserva ru_maxrss a través de exec, y los hijos
+    # heredarían el pico de generar las fotos de 40 MP
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+        cases = pool.submit(generate_cases, sizes, data_dir, args.seed, args.group_pages).result()
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for case in cases:
+            for name in stages:
+                # Un proceso por etapa: ni cachés ni pico de memoria heredados de la anterior
+                with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                    result = pool.submit(run_stage, name, case, args.repeat, out_dir).result()
+                results.append(result)
+                extra = f"  error esquina {result['corner_error']:.4f}" if result.get('corner_error') is not None else ""
+                print(f"{name:<20}{case['mp']:>4} MP  mediana {result['median']:.4f} s  "
+                      f"mín {result['min']:.4f} s  +{result['stage_peak_mb']:.0f} MB{extra}", file=sys.stderr)
+
+    report = {'meta': _metadata(), 'params': {'seed': args.seed, 'repeat': args.repeat,
+                                              'group_pages': args.group_pages}, 'results': results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# cli.py
+"""
+Modo headless/lote: mismo pipeline que la GUI (carga, agrupado, recorte automático,
+exportación a PDF) sin QtWidgets ni display. Pensado para cron en servidores.
+
+Ejemplo:
+    python cli.py "entrada/**/*.jpg" -o salida --group dir --auto-crop --profile email -j 8
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from core.image_loader import ImageLoader, IMG_EXTS
+from core.folder_scan import scan_folder
+from core.pages import expand_pages, page_name
+from core.group_handler import GroupHandler
+from core.image_editor import ImageEditor
+from core.export_profiles import PROFILES, DEFAULT_PROFILE
+from core.pdf_exporter import PDFExporter
+from core.batch_export import BatchExporter, build_jobs
+from core import trace
+
+
+def expand_inputs(patterns: list[str], recursive: bool) -> list[str]:
+    """
+    Globs y directorios -> rutas absolutas de imágenes, sin repetir y en orden estable.
+    Los TIFF/PDF de varias páginas se sustituyen por sus páginas (archivo#page=N).
+    """
+    found = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for m in matches:
+            if os.path.isdir(m):
+                for batch in scan_folder(m, recursive):
+                    found.extend(batch)
+            elif os.path.isfile(m):
+                found.append(m)
+    seen = set()
+    paths = []
+    for p in found:
+        p = os.path.abspath(p)
+        if p.lower().endswith(IMG_EXTS) and p not in seen:
+            seen.add(p)
+            paths.append(p)
+    return expand_pages(paths)
+
+
+def group_paths(paths: list[str], rule: str, pattern: str | None, name: str) -> dict[str, list[str]]:
+    """Aplica la regla de agrupado. Devuelve {nombre_grupo: [rutas]}; lo que no entra queda suelto."""
+    groups = {}
+    if pattern:
+        regex = re.compile(pattern)
+        for p in paths:
+            m = regex.search(os.path.basename(p))
+            if m:
+                key = m.group(1) if m.groups() else m.group(0)
+                groups.setdefault(key, []).append(p)
+    elif rule == "dir":
+        by_folder = {}
+        for p in paths:
+            by_folder.setdefault(os.path.dirname(p), []).append(p)
+        used = set()
+        for folder, members in by_folder.items():
+            # Se agrupa por la carpeta completa; el nombre del PDF es solo la última parte, sin repetir
+            groups[_unique(os.path.basename(folder) or "raiz", used)] = members
+    elif rule == "all" and paths:
+        groups[name] = list(paths)
+    return groups
+
+
+def _unique(name: str, used: set) -> str:
+    candidate, n = name, 2
+    while candidate in used:
+        candidate = f"{name}_{n}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta imágenes de documentos a PDF sin interfaz gráfica.")
+    parser.add_argument("inputs", nargs="+", help="Globs, archivos o carpetas de entrada (admite **)")
+    parser.add_argument("-o", "--output", required=True, help="Carpeta de salida para los PDFs")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Recorrer subcarpetas de las carpetas dadas")
+    parser.add_argument("--group", choices=("none", "dir", "all"), default="none",
+                        help="none: un PDF por imagen; dir: un PDF por carpeta; all: un único PDF")
+    parser.add_argument("--group-pattern", metavar="REGEX",
+                        help="Agrupar por el primer grupo de captura de REGEX sobre el nombre de archivo")
+    parser.add_argument("--name", default="documento", help="Nombre del PDF con --group all")
+    parser.add_argument("--auto-crop", action="store_true", help="Recorte automático del documento en cada página")
+    parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE, help="Perfil de exportación")
+    parser.add_argument("--no-passthrough", action="store_true", help="Recodificar siempre, sin incrustar JPEGs originales")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--trace", metavar="JSON",
+                        help="Medir cada etapa: resumen por stderr y traza Chrome (chrome://tracing, Perfetto) en JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostrar cada documento al terminar")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.trace:
+        trace.enable()  # Antes de crear el pool: los workers heredan la variable de entorno
+    paths = expand_inputs(args.inputs, args.recursive)
+    if not paths:
+        print("No se encontraron imágenes.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+
+    # Mismo modelo que la GUI: sueltas en el loader, grupos en el GroupHandler
+    editor = ImageEditor()
+    loader = ImageLoader(editor)
+    group_handler = GroupHandler()
+    loader.add_dropped_paths(paths, expanded=True)  # expand_inputs ya separó las páginas
+    used_names = set()
+    for name, members in group_paths(paths, args.group, args.group_pattern, args.name).items():
+        group_handler.create_group(members, _unique(name, used_names))
+        for p in members:
+            loader.remove_path(p)
+    for p in loader.images:
+        loader.set_name(p, _unique(os.path.splitext(page_name(p))[0], used_names))
+
+    exporter = PDFExporter(args.profile, passthrough=not args.no_passthrough)
+    jobs = build_jobs(loader, group_handler, editor, args.output, exporter.settings(), args.auto_crop)
+    pages_per_job = {job['name']: len(job['pages']) for job in jobs}
+    failed = set()
+
+    def on_progress(done, name):
+        if args.verbose:
+            print(f"[{done}/{len(jobs)}] {name}", file=sys.stderr)
+
+    def on_error(name, message):
+        failed.add(name)
+        print(f"ERROR {name}: {message}", file=sys.stderr)
+
+    batch = BatchExporter(args.workers)
+    start = time.perf_counter()
+    try:
+        batch.run(jobs, on_progress=on_progress, on_error=on_error)
+    except KeyboardInterrupt:
+        batch.cancel()
+        print("Cancelado.", file=sys.stderr)
+        return 130
+    elapsed = time.perf_counter() - start
+
+    if args.trace:
+        print(trace.format_summary(), file=sys.stderr)
+        trace.write_chrome_trace(args.trace)
+
+    pages = sum(n for name, n in pages_per_job.items() if name not in failed)
+    docs = len(jobs) - len(failed)
+    rate = pages / elapsed if elapsed > 0 else 0.0
+    print(f"{docs} PDFs, {pages} páginas en {elapsed:.2f} s ({rate:.2f} páginas/s), {len(failed)} errores")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# core/batch_crop.py
+from core.image_editor import ImageEditor
+from core.process_pool import PoolRunner, check_cancel, page_spec, worker_editor
+
+CHUNK_SIZE = 8  # Páginas por tarea: la detección de cada trozo se hace en un solo lote
+
+
+def build_crop_tasks(editor: ImageEditor, paths: list[str]) -> list[dict]:
+    return [page_spec(editor, p, auto_crop=True) for p in paths]
+
+
+def _chunks(tasks: list[dict], size: int = CHUNK_SIZE) -> list[list[dict]]:
+    return [tasks[i:i + size] for i in range(0, len(tasks), size)]
+
+
+def crop_task(pages: list[dict]) -> list[tuple]:
+    """
+    Recorte automático de un trozo de páginas en un worker.
+    Por página devuelve (ruta, resultado) con resultado ('edits', nuevas operaciones),
+    ('skipped',) si ya estaba recortada, ('error', mensaje) o None si no se detectó documento.
+    """
+    editor = worker_editor(pages)
+    check_cancel()
+    # Las páginas aún sin recortar se detectan juntas sobre proxies del original
+    editor.detect_documents([p['path'] for p in pages if p['auto_crop']])
+
+    results = []
+    for page in pages:
+        check_cancel()
+        path = page['path']
+        if not page['auto_crop']:
+            # Ya recortada: otro recorte se apilaría sobre el anterior (como en batch_export.run_job)
+            results.append((path, ('skipped',)))
+            continue
+        try:
+            if not editor.auto_crop(path):
+                results.append((path, None))
+            else:
+                results.append((path, ('edits', editor.edits_for(path))))
+        except Exception as e:
+            results.append((path, ('error', str(e))))
+    return results
+
+
+class BatchCropper(PoolRunner):
+    """Ejecuta el recorte automático sobre muchas páginas en paralelo, en trozos de CHUNK_SIZE."""
+
+    def __init__(self, max_workers: int | None = None):
+        super().__init__(max_workers)
+        self.errors = []
+        self.skipped = []  # Rutas que ya estaban recortadas
+
+    def run(self, tasks: list[dict], on_cropped=None, on_progress=None, on_error=None) -> list[str]:
+        """
+        on_cropped(ruta, operaciones) recibe la nueva lista de operaciones de cada página recortada.
+        on_progress(páginas hechas, ruta) avanza por página.
+        Devuelve las rutas sin documento detectado; las ya recortadas quedan en self.skipped.
+        """
+        chunks = {chunk[0]['path']: chunk for chunk in _chunks(tasks)}
+        not_detected = []
+        self.errors = []
+        self.skipped = []
+        done = 0
+
+        def page_done(path):
+            nonlocal done
+            done += 1
+            if on_progress:
+                on_progress(done, path)
+
+        def page_failed(path, message):
+            self.errors.append(f"{path}: {message}")
+            if on_error:
+                on_error(path, message)
+
+        def on_result(chunk, results):
+            for path, result in results:
+                if result is None:
+                    not_detected.append(path)
+                elif result[0] == 'skipped':
+                    self.skipped.append(path)
+                elif result[0] == 'error':
+                    page_failed(path, result[1])
+                elif on_cropped:
+                    on_cropped(path, result[1])
+                page_done(path)
+
+        def on_chunk_error(name, message):
+            # Falló el trozo entero (p.ej. al decodificar): se reporta cada página
+            for page in chunks[name]:
+                page_failed(page['path'], message)
+                page_done(page['path'])
+
+        self.map(crop_task, list(chunks.values()), lambda chunk: chunk[0]['path'],
+                 on_result=on_result, on_error=on_chunk_error)
+        return not_detected
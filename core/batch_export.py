@@ -0,0 +1,73 @@
+# core/batch_export.py
+import os
+from core.image_editor import ImageEditor
+from core.pdf_exporter import PDFExporter
+from core import trace
+from core.process_pool import PoolRunner, TaskCancelled, check_cancel, page_spec, worker_editor
+
+
+def build_jobs(loader, group_handler, editor: ImageEditor, output_dir: str,
+               exporter_settings: dict | None = None, auto_crop: bool = False) -> list[dict]:
+    """
+    Describe cada PDF a generar (sueltas y luego grupos) con todo lo necesario para un worker.
+    exporter_settings es PDFExporter.settings() (perfil, passthrough).
+    Con auto_crop, el worker recorta automáticamente las páginas que aún no estén recortadas.
+    """
+    settings = exporter_settings or {}
+    jobs = []
+    count = 0
+    for path in loader.images:
+        name = loader.get_name(path) or f"documento_{count + 1}"
+        jobs.append({
+            'kind': 'single',
+            'name': name,
+            'save_path': os.path.join(output_dir, f"{name}.pdf"),
+            'pages': [page_spec(editor, path, auto_crop)],
+            'exporter': settings,
+        })
+        count += 1
+    for group in group_handler.groups.values():
+        name = group_handler.get_group_name(group) or f"grupo_{count + 1}"
+        jobs.append({
+            'kind': 'group',
+            'name': name,
+            'save_path': os.path.join(output_dir, f"{name}.pdf"),
+            'pages': [page_spec(editor, p, auto_crop) for p in group_handler.get_group_paths(group)],
+            'exporter': settings,
+        })
+        count += 1
+    return jobs
+
+
+def run_job(job: dict) -> str:
+    """Exporta un trabajo de build_jobs. Se ejecuta en un worker del pool."""
+    editor = worker_editor(job['pages'])
+    exporter = PDFExporter(**job['exporter'])
+    save_path = job['save_path']
+
+    def pages():
+        for page in job['pages']:
+            check_cancel()  # Cancelar a mitad de un grupo grande
+            path = page['path']
+            if page.get('auto_crop'):
+                editor.auto_crop(path)
+            yield exporter.page_for(editor, path)
+
+    try:
+        with trace.document(job['name']):
+            if job['kind'] == 'single':
+                exporter.export_image_to_pdf(next(pages()), save_path)
+            else:
+                exporter.export_images_to_pdf(pages(), save_path)
+    except TaskCancelled:
+        if os.path.exists(save_path):
+            os.unlink(save_path)
+        raise
+    return save_path
+
+
+class BatchExporter(PoolRunner):
+    """Exporta los trabajos de build_jobs en paralelo."""
+
+    def run(self, jobs: list[dict], on_progress=None, on_error=None) -> list[str]:
+        return self.map(run_job, jobs, lambda job: job['name'], on_progress=on_progress, on_error=on_error)
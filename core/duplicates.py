@@ -0,0 +1,172 @@
+# core/duplicates.py
+import os
+import sqlite3
+import threading
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QImage
+from core.pages import PageReader, source_file
+from core.thumbnail_cache import default_cache_dir
+
+HASH_W, HASH_H = 9, 8  # dHash: 8 comparaciones por fila x 8 filas = 64 bits
+MAX_DISTANCE = 4       # Bits distintos hasta los que dos imágenes cuentan como la misma
+CHUNKS = MAX_DISTANCE + 1  # Por el principio del palomar, un duplicado coincide exacto en al menos un trozo
+
+
+def default_hash_db() -> str:
+    """Junto a las miniaturas: $XDG_CACHE_HOME/gestor-documentos/hashes.sqlite."""
+    return os.path.join(os.path.dirname(default_cache_dir()), "hashes.sqlite")
+
+
+def dhash(ref: str) -> int | None:
+    """Hash perceptual de 64 bits (dHash) sobre un proxy de 9x8 en gris. None si no se puede leer."""
+    reader = PageReader(ref)
+    size = reader.size()
+    if size.isValid():
+        # El decodificador reduce (en JPEG, en la DCT); el suavizado final promedia el resto
+        reader.setScaledSize(size.scaled(QSize(HASH_W * 16, HASH_H * 16), Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    small = image.convertToFormat(QImage.Format.Format_Grayscale8).scaled(
+        HASH_W, HASH_H, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    ptr = small.constBits()
+    ptr.setsize(small.sizeInBytes())
+    data = bytes(ptr)
+    stride = small.bytesPerLine()
+    value = 0
+    for y in range(HASH_H):
+        row = data[y * stride:y * stride + HASH_W]
+        for x in range(HASH_W - 1):
+            value = (value << 1) | (row[x] > row[x + 1])
+    return value
+
+
+class HashStore:
+    """
+    Hashes en disco por identidad de archivo (ruta, mtime, tamaño): volver a cargar
+    la misma carpeta no decodifica nada. Se puede usar desde varios hilos.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or default_hash_db()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS hashes (key TEXT PRIMARY KEY, hash INTEGER NOT NULL)")
+
+    @staticmethod
+    def _key(ref: str) -> str | None:
+        try:
+            st = os.stat(source_file(ref))
+        except OSError:
+            return None
+        return f"{os.path.abspath(ref)}|{st.st_mtime_ns}|{st.st_size}"
+
+    def hashes(self, refs: list[str]) -> list[tuple[str, int | None]]:
+        """(ruta, hash) de cada ruta: los guardados se leen, el resto se calcula y se guarda."""
+        keys = [self._key(ref) for ref in refs]
+        with self._lock:
+            known = {}
+            for key in keys:
+                if key is not None:
+                    row = self.db.execute("SELECT hash FROM hashes WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        known[key] = row[0] & 0xFFFFFFFFFFFFFFFF  # SQLite guarda enteros con signo
+        results, new = [], []
+        for ref, key in zip(refs, keys):
+            value = known.get(key)
+            if value is None and key is not None:
+                value = dhash(ref)
+                if value is not None:
+                    new.append((key, value - (1 << 64) if value >= 1 << 63 else value))
+            results.append((ref, value))
+        if new:
+            with self._lock, self.db:
+                self.db.executemany("INSERT OR REPLACE INTO hashes (key, hash) VALUES (?, ?)", new)
+        return results
+
+
+class DuplicateIndex:
+    """
+    Índice multi-trozo (multi-index hashing) para buscar por distancia de Hamming: el hash se parte
+    en CHUNKS trozos y cada uno va a su diccionario, así buscar solo mira las entradas que comparten
+    algún trozo exacto. Una imagen es duplicado de la de menor orden de carga que esté a <= MAX_DISTANCE;
+    el orden lo da quien llama, así da igual en qué orden terminen de calcularse los hashes.
+    """
+
+    def __init__(self):
+        self._hashes = {}  # {ruta: hash}
+        self._order = {}   # {ruta: orden de carga}
+        self._buckets = [{} for _ in range(CHUNKS)]  # {trozo: {rutas}} por posición
+        self.duplicate_of = {}  # {ruta: ruta original}
+        bits = 64 // CHUNKS
+        # (desplazamiento, máscara) de cada trozo; el último se queda con los bits sobrantes
+        self._spans = [(i * bits, (1 << (64 - i * bits if i == CHUNKS - 1 else bits)) - 1) for i in range(CHUNKS)]
+
+    def matches(self, value: int, exclude=None) -> list[str]:
+        """Rutas a distancia <= MAX_DISTANCE de value."""
+        hashes = self._hashes
+        found = set()
+        for bucket, (shift, mask) in zip(self._buckets, self._spans):
+            found.update(k for k in bucket.get((value >> shift) & mask, ())
+                         if (hashes[k] ^ value).bit_count() <= MAX_DISTANCE)
+        found.discard(exclude)
+        return list(found)
+
+    def _original_for(self, key: str) -> str | None:
+        order = self._order[key]
+        earlier = [k for k in self.matches(self._hashes[key], key) if self._order[k] < order]
+        return min(earlier, key=self._order.get) if earlier else None
+
+    def _resolve(self, key: str, changed: dict):
+        """Recalcula la original de key y anota en changed si cambió."""
+        original = self._original_for(key)
+        if original == self.duplicate_of.get(key):
+            return
+        if original is None:
+            del self.duplicate_of[key]
+        else:
+            self.duplicate_of[key] = original
+        changed[key] = original
+
+    def add(self, key: str, value: int, order: int) -> dict[str, str | None]:
+        """
+        Indexa una ruta con su orden de carga. Devuelve {ruta: original o None} de las que cambian:
+        la nueva si es duplicado y, si llegó tarde, las cargadas después que ahora son duplicado de ella.
+        """
+        if key in self._hashes:
+            return {}
+        self._hashes[key] = value
+        self._order[key] = order
+        for bucket, (shift, mask) in zip(self._buckets, self._spans):
+            bucket.setdefault((value >> shift) & mask, set()).add(key)
+        changed = {}
+        found = self.matches(value, key)
+        earlier = [k for k in found if self._order[k] < order]
+        if earlier:
+            self.duplicate_of[key] = changed[key] = min(earlier, key=self._order.get)
+        for other in found:
+            if self._order[other] > order:
+                self._resolve(other, changed)  # Llegó antes su hash, pero se cargó después
+        return changed
+
+    def remove(self, key: str) -> dict[str, str | None]:
+        """Quita una ruta. Devuelve {ruta: nueva original o None} de las que la tenían como original."""
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return {}
+        for bucket, (shift, mask) in zip(self._buckets, self._spans):
+            chunk = (value >> shift) & mask
+            bucket[chunk].discard(key)
+            if not bucket[chunk]:
+                del bucket[chunk]
+        del self._order[key]
+        self.duplicate_of.pop(key, None)
+        changed = {}
+        for dup in [k for k, original in self.duplicate_of.items() if original == key]:
+            self._resolve(dup, changed)
+        return changed
+
+    def __len__(self):
+        return len(self._hashes)
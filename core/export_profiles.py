@@ -0,0 +1,27 @@
+# core/export_profiles.py
+"""
+Perfiles de compresión para PDFExporter.
+
+dpi:          resolución objetivo al tamaño de la página (None = píxeles originales, 1 px = 1 pt)
+jpeg_quality: calidad JPEG cuando encoding es 'jpeg'
+color:        'color' | 'gray' | 'bilevel' | 'auto' (gris o bitonal si la página no tiene color)
+encoding:     'flate' (sin pérdida) | 'jpeg'
+
+PdfWriter no escribe flujos CCITT G4, así que las páginas bitonales se guardan con Flate,
+que sobre blanco/negro puro comprime de forma parecida.
+"""
+
+DEFAULT_PROFILE = "original"
+
+PROFILES = {
+    "original": {"dpi": None, "jpeg_quality": None, "color": "color", "encoding": "flate"},
+    "archive": {"dpi": 300, "jpeg_quality": 90, "color": "auto", "encoding": "jpeg"},
+    "email": {"dpi": 150, "jpeg_quality": 70, "color": "auto", "encoding": "jpeg"},
+    "fax": {"dpi": 200, "jpeg_quality": None, "color": "bilevel", "encoding": "flate"},
+}
+
+
+def get_profile(name: str) -> dict:
+    if name not in PROFILES:
+        raise ValueError(f"Perfil de exportación desconocido: {name}")
+    return PROFILES[name]
@@ -0,0 +1,68 @@
+# core/folder_scan.py
+import os
+from core.image_loader import IMG_EXTS
+
+BATCH_SIZE = 256  # Rutas por lote entregado a la GUI
+
+# Firmas de los formatos de IMG_EXTS (primeros bytes del archivo)
+_MAGIC = (
+    b"\xff\xd8\xff",       # JPEG
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"BM",                 # BMP
+    b"II*\x00",            # TIFF little-endian
+    b"MM\x00*",            # TIFF big-endian
+    b"%PDF-",              # PDF
+)
+
+
+def looks_like_image(path: str) -> bool:
+    """Comprueba la firma del archivo: descarta lo que solo tiene la extensión de imagen."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(12)
+    except OSError:
+        return False
+    if head.startswith(_MAGIC):
+        return True
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+def scan_folder(root: str, recursive: bool = True, sniff: bool = True,
+                batch_size: int = BATCH_SIZE, cancelled=lambda: False):
+    """
+    Recorre root con os.scandir y va devolviendo lotes de rutas de imagen, en orden estable
+    (por nombre dentro de cada carpeta). cancelled() se consulta entre entradas para cortar el recorrido.
+    """
+    batch = []
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue  # Sin permisos o desmontada: seguir con el resto
+        subdirs = []
+        for entry in entries:
+            if cancelled():
+                return
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if not entry.name.lower().endswith(IMG_EXTS):
+                continue
+            if sniff and not looks_like_image(entry.path):
+                continue
+            batch.append(os.path.abspath(entry.path))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        stack.extend(reversed(subdirs))  # Primero la subcarpeta de nombre menor
+    if batch:
+        yield batch
@@ -4,7 +4,8 @@ import random  # Para colores random iniciales
 
 class GroupHandler:
     def __init__(self):
-        self.groups = []  # Lista de dicts: {'name': str, 'paths': [str], 'color': QColor}
+        self.groups = {}  # {id(grupo): {'name': str, 'paths': [str], 'color': QColor}} en orden de creación
+        self.session = None  # Session que guarda cada cambio, si la hay
         self.colors = [QColor("lightblue"), QColor("lightgreen"), QColor("lightyellow"), QColor("lightpink"), QColor("lightgray")]
 
     def create_group(self, paths: list[str], default_name: str = "Grupo"):
@@ -12,12 +13,18 @@ class GroupHandler:
             return None
         color = random.choice(self.colors)  # Asignar color random
         group = {'name': default_name, 'paths': paths, 'color': color}
-        self.groups.append(group)
+        self.groups[id(group)] = group
+        if self.session is not None:
+            self.session.add_group(group)
         return group
 
     def remove_group(self, group):
-        if group in self.groups:
-            self.groups.remove(group)
+        self.groups.pop(id(group), None)
+        if self.session is not None:
+            self.session.remove_group(group)
+
+    def clear(self):
+        self.groups.clear()
 
     def get_group_name(self, group):
         return group['name']
@@ -25,6 +32,8 @@ class GroupHandler:
     def set_group_name(self, group, new_name: str):
         if new_name:
             group['name'] = new_name
+            if self.session is not None:
+                self.session.set_group_name(group, new_name)
 
     def get_group_paths(self, group):
         return group['paths']
\ No newline at end of file
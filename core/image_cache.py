@@ -0,0 +1,68 @@
+# core/image_cache.py
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET = 512 * 1024 * 1024  # 512 MB de píxeles decodificados
+PREVIEW_BUDGET = 128 * 1024 * 1024  # 128 MB de pixmaps a tamaño de pantalla
+
+
+def _cost(value) -> int:
+    """Bytes aproximados que ocupa una QImage/QPixmap en memoria."""
+    if hasattr(value, "sizeInBytes"):  # QImage
+        return value.sizeInBytes()
+    if hasattr(value, "depth"):  # QPixmap
+        return value.width() * value.height() * max(value.depth(), 8) // 8
+    return 0
+
+
+class ImageCache:
+    """
+    Caché LRU con presupuesto en bytes.
+    Las claves son tuplas con la ruta y su estado, p.ej. (ruta, mtime, rotación): si el archivo
+    o su edición cambian, la clave nueva no coincide y las entradas viejas salen por LRU.
+    """
+
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.budget = budget
+        self._items = OrderedDict()  # {clave: (valor, bytes)}
+        self._used = 0
+        self._lock = threading.Lock()  # Compartida entre el hilo GUI y los workers
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            self._items.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        cost = _cost(value)
+        if cost > self.budget:
+            return  # Nunca cabría: no desalojar todo por una sola imagen
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._used -= old[1]
+            self._items[key] = (value, cost)
+            self._used += cost
+            while self._used > self.budget and self._items:
+                _, (_, evicted_cost) = self._items.popitem(last=False)
+                self._used -= evicted_cost
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._used = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used
+
+    def __len__(self):
+        return len(self._items)
+
+
+# Cachés compartidas por todos los ImageEditor del proceso
+shared_cache = ImageCache()
+preview_cache = ImageCache(PREVIEW_BUDGET)
@@ -1,45 +1,521 @@
 # core/image_editor.py (Actualizado)
-from PyQt6.QtGui import QPixmap, QTransform, QImage
-from PyQt6.QtCore import QSize, Qt
+import os
+from functools import lru_cache
+from PyQt6.QtGui import QPixmap, QTransform, QImage, QImageIOHandler, QImageReader
+from PyQt6.QtCore import QRectF, QSize, Qt
+from core.image_cache import shared_cache, preview_cache
+from core.trace import span
+from core.pages import PageReader, read_page, source_file
+
+# NumPy y OpenCV (core.image_processor) se importan dentro de las funciones que los usan:
+# abrir la ventana y mostrar imágenes sin recortar no los necesita, y tardan en cargar.
+
+JPEG_EXTS = (".jpg", ".jpeg")
+
+
+class JpegPage:
+    """JPEG original sin editar: se incrusta tal cual en el PDF y la rotación va como /Rotate."""
+
+    def __init__(self, path: str, rotation: int, size: QSize):
+        self.path = path
+        self.rotation = rotation
+        self.size = size
+
+    def width(self) -> int:
+        return self.size.width()
+
+    def height(self) -> int:
+        return self.size.height()
+
+
+class RasterPage:
+    """Píxeles ya editados pero sin girar: el giro múltiplo de 90° va como /Rotate en el PDF."""
+
+    def __init__(self, image: QImage, rotation: int):
+        self.image = image
+        self.rotation = rotation
+
+    def width(self) -> int:
+        return self.image.width()
+
+    def height(self) -> int:
+        return self.image.height()
+
+    def isNull(self) -> bool:
+        return self.image.isNull()
+
+
+# Orientación EXIF -> giro horario; las variantes espejadas no se aplican
+_EXIF_ROTATIONS = {
+    QImageIOHandler.Transformation.TransformationRotate90: 90,
+    QImageIOHandler.Transformation.TransformationRotate180: 180,
+    QImageIOHandler.Transformation.TransformationRotate270: 270,
+}
+
+
+def exif_rotation(path: str) -> int:
+    """Giro que indica la orientación EXIF del archivo (solo lee la cabecera)."""
+    return _EXIF_ROTATIONS.get(PageReader(path).transformation(), 0)
+
+
+def rotate_image(image: QImage, angle: int) -> QImage:
+    """Gira en sentido horario. Los múltiplos de 90° son una transposición exacta, sin remuestrear."""
+    mode = Qt.TransformationMode.FastTransformation if angle % 90 == 0 else Qt.TransformationMode.SmoothTransformation
+    return image.transformed(QTransform().rotate(angle), mode)
+
+
+def _map_points(transform: QTransform, pts):
+    """Aplica una QTransform afín a un array de puntos (N, 2)."""
+    import numpy as np
+    x, y = pts[:, 0], pts[:, 1]
+    return np.stack([
+        transform.m11() * x + transform.m21() * y + transform.dx(),
+        transform.m12() * x + transform.m22() * y + transform.dy(),
+    ], axis=1).astype("float32")
+
+
+def _view_transform(angle: int, width: int, height: int) -> QTransform:
+    """La misma matriz que usa QImage.transformed() para girar angle grados una imagen de width x height."""
+    return QImage.trueMatrix(QTransform().rotate(angle), width, height)
+
+
+def _rotated_size(angle: int, width: int, height: int) -> tuple[int, int]:
+    rect = _view_transform(angle, width, height).mapRect(QRectF(0, 0, width, height))
+    return round(rect.width()), round(rect.height())
+
+
+FILTERS = {'gray': 'to_grayscale', 'bilevel': 'to_bilevel'}  # nombre -> función de core.image_processor
+
+
+def _apply_filter(name: str, image: QImage) -> QImage:
+    from core import image_processor
+    return getattr(image_processor, FILTERS[name])(image)
+
+
+@lru_cache(maxsize=4096)
+def fold_edits(edits: tuple, source: tuple[int, int]) -> dict:
+    """
+    Reduce la lista de operaciones de una página a un único plan sobre el original:
+    {'quad': esquinas TL, TR, BR, BL en píxeles del original o None, 'size': (ancho, alto) enderezado,
+     'source': (ancho, alto), 'angle': giro final, 'filters': filtros en orden}.
+    Cada ('quad', esquinas, tamaño) viene en coordenadas de la imagen tal como se veía en ese punto,
+    así que recortes y giros anteriores se funden en un solo warp.
+    """
+    import numpy as np
+    from core.image_processor import unwarp_points
+    quad, size, angle, filters = None, source, 0, ()
+    for op in edits:
+        kind = op[0]
+        if kind == 'rotate':
+            angle = (angle + op[1]) % 360
+        elif kind == 'quad':
+            # Vista girada -> etapa sin girar -> original
+            pts = np.array(op[1], dtype="float32")
+            inverse, _ = _view_transform(angle, *size).inverted()
+            pts = _map_points(inverse, pts)
+            if quad is not None:
+                pts = unwarp_points(pts, quad, size)
+            quad, size, angle = pts, tuple(op[2]), 0
+        elif kind == 'filter':
+            filters += (op[1],)
+    return {
+        'quad': quad.tolist() if quad is not None else None,
+        'size': size,
+        'source': source,
+        'angle': angle,
+        'filters': filters,
+    }
+
 
 class ImageEditor:
-    def __init__(self):
-        self.rotations = {}  # {path: grados}
-        self.edited_images = {}  # {path: QImage editada (post-recorte/filtro)}
+    def __init__(self, cache=None, previews=None):
+        # {path: (('rotate', grados) | ('quad', esquinas TL, TR, BR, BL, (ancho, alto)) | ('filter', nombre), ...)}
+        # Solo se guardan las operaciones; los píxeles se calculan al verlos o exportarlos
+        self.edits = {}
+        # {(path, mtime): {'quad': esquinas normalizadas 0-1, 'confidence': float, 'scale': original/proxy} o None}
+        self.detections = {}
+        self._detector = None  # DocumentDetector con buffers reutilizables, se crea al primer lote
+        self._sizes = {}  # {(path, mtime): (ancho, alto)} leídos de la cabecera
+        self._exif_pending = set()  # Rutas cuya orientación EXIF aún no se leyó
+        self._oriented = set()  # Rutas con la orientación ya decidida (EXIF leído u operaciones dadas)
+        self.session = None  # Session que guarda cada cambio, si la hay
+        self.listeners = []  # Funciones listener(ruta) llamadas cada vez que cambian las operaciones de una página
+        self.cache = cache if cache is not None else shared_cache  # Resolución completa (exportar/recortar)
+        self.previews = previews if previews is not None else preview_cache  # Pixmaps a tamaño de pantalla
+
+    def edits_for(self, path: str) -> tuple:
+        if path in self._exif_pending:
+            # La cabecera se lee la primera vez que alguien necesita las operaciones de la página
+            self._exif_pending.discard(path)
+            self._oriented.add(path)
+            angle = exif_rotation(path)
+            if angle and path not in self.edits:
+                self.edits[path] = (('rotate', angle),)
+        return self.edits.get(path, ())
+
+    def set_edits(self, path: str, edits):
+        self._exif_pending.discard(path)  # Las operaciones dadas ya deciden la orientación
+        self._oriented.add(path)
+        edits = tuple(edits)
+        if edits:
+            self.edits[path] = edits
+        else:
+            self.edits.pop(path, None)
+        if self.session is not None:
+            self.session.set_edits(path, edits)
+        for listener in self.listeners:
+            listener(path)
+
+    def _append(self, path: str, op: tuple):
+        self.set_edits(path, self.edits_for(path) + (op,))
 
     def rotation_for(self, path: str) -> int:
-        return self.rotations.get(path, 0)
+        return self.plan(path)['angle']
 
     def rotate(self, path: str, angle: int) -> int:
-        new_angle = (self.rotation_for(path) + angle) % 360
-        self.rotations[path] = new_angle
-        return new_angle
+        edits = self.edits_for(path)
+        if edits and edits[-1][0] == 'rotate':
+            # Giros seguidos se acumulan en una sola operación
+            angle = (edits[-1][1] + angle) % 360
+            edits = edits[:-1]
+        self.set_edits(path, edits + ((('rotate', angle),) if angle % 360 else ()))
+        return self.rotation_for(path)
 
-    def set_edited(self, path: str, img: QImage):
-        if not img.isNull():
-            self.edited_images[path] = img
+    def apply_exif_orientation(self, path: str):
+        """
+        Para imágenes recién cargadas: la orientación de la cámara pasará a ser un giro más.
+        No toca el archivo aquí, así cargar miles de rutas no espera a leer sus cabeceras.
+        Si la orientación ya se decidió (aunque el usuario la devolviera a la del archivo, sin
+        operaciones), no se vuelve a aplicar.
+        """
+        if path not in self._oriented:
+            self._exif_pending.add(path)
+
+    def clear_edits(self):
+        """Olvida las operaciones y la orientación de todas las páginas (Nueva sesión)."""
+        self.edits.clear()
+        self._exif_pending.clear()
+        self._oriented.clear()
+
+    def add_filter(self, path: str, name: str):
+        if name not in FILTERS:
+            raise ValueError(f"Filtro desconocido: {name}")
+        self._append(path, ('filter', name))
+
+    @staticmethod
+    def _file_version(path: str):
+        try:
+            return os.stat(source_file(path)).st_mtime_ns  # Las páginas cambian con su archivo
+        except OSError:
+            return None
+
+    def source_size(self, path: str) -> tuple[int, int]:
+        """Tamaño del original leyendo solo la cabecera."""
+        key = (path, self._file_version(path))
+        size = self._sizes.get(key)
+        if size is None:
+            qsize = PageReader(path).size()
+            size = (max(0, qsize.width()), max(0, qsize.height()))
+            self._sizes[key] = size
+        return size
+
+    def plan(self, path: str) -> dict:
+        """Operaciones de la página fundidas en un plan (ver fold_edits)."""
+        edits = self.edits_for(path)
+        if not any(op[0] == 'quad' for op in edits):
+            # Sin recortes no hace falta el tamaño del original
+            angle = sum(op[1] for op in edits if op[0] == 'rotate') % 360
+            filters = tuple(op[1] for op in edits if op[0] == 'filter')
+            return {'quad': None, 'size': None, 'source': None, 'angle': angle, 'filters': filters}
+        return fold_edits(edits, self.source_size(path))
+
+    def _cache_key(self, path: str, angle: int, plan: dict | None = None) -> tuple:
+        """
+        Clave (ruta, mtime del original, recorte, filtros, rotación).
+        Sin plan es la del original tal cual, sin recortar ni filtrar.
+        """
+        quad_key = tuple(map(tuple, plan['quad'])) if plan and plan['quad'] else None
+        filters = plan['filters'] if plan else ()
+        return (path, self._file_version(path), quad_key, filters, angle)
+
+    def _load_source(self, path: str) -> QImage:
+        """Archivo original sin rotar ni recortar; se decodifica una sola vez."""
+        key = self._cache_key(path, 0)
+        source = self.cache.get(key)
+        if source is None:
+            with span("decode"):
+                source = read_page(path)
+            if not source.isNull():
+                self.cache.put(key, source)
+        return source
+
+    def _warp_crop(self, source: QImage, plan: dict) -> QImage:
+        """Endereza el recorte sobre source, que puede ser el original o una versión reducida."""
+        import numpy as np
+        from core.image_processor import array_to_qimage, qimage_view, warp_quad
+        scale = source.width() / float(plan['source'][0])
+        quad = np.array(plan['quad'], dtype="float32") * scale
+        size = (max(1, round(plan['size'][0] * scale)), max(1, round(plan['size'][1] * scale)))
+        return array_to_qimage(warp_quad(qimage_view(source), quad, size))
+
+    def _develop(self, source: QImage, plan: dict) -> QImage:
+        """Aplica el plan sin rotar a source: un único warp y después los filtros."""
+        if source.isNull():
+            return source
+        if plan['quad'] is not None:
+            source = self._warp_crop(source, plan)
+        for name in plan['filters']:
+            with span("filter"):
+                source = _apply_filter(name, source)
+        return source
+
+    def _load_base(self, path: str, plan: dict) -> QImage:
+        """Imagen sin rotar: original, o recortada/filtrada a resolución completa y cacheada."""
+        if plan['quad'] is None and not plan['filters']:
+            return self._load_source(path)
+        key = self._cache_key(path, 0, plan)
+        base = self.cache.get(key)
+        if base is None:
+            base = self._develop(self._load_source(path), plan)
+            if not base.isNull():
+                self.cache.put(key, base)
+        return base
 
     def get_current_image(self, path: str) -> QImage:
-        """Devuelve la imagen base (original o editada) con rotación aplicada."""
-        if path in self.edited_images:
-            base = self.edited_images[path]
-        else:
-            base = QImage(path)
+        """Devuelve la imagen con todas sus operaciones aplicadas."""
+        plan = self.plan(path)
+        angle = plan['angle']
+        key = self._cache_key(path, angle, plan)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        base = self._load_base(path, plan)
         if base.isNull():
             return QImage()
-        angle = self.rotation_for(path)
         if angle:
-            transform = QTransform().rotate(angle)
-            base = base.transformed(transform, Qt.TransformationMode.SmoothTransformation)
+            with span("rotate"):
+                base = rotate_image(base, angle)
+            self.cache.put(key, base)
         return base
 
+    def raster_page(self, path: str) -> RasterPage | None:
+        """Página para exportar sin transponer los píxeles: solo si el giro es múltiplo de 90°."""
+        plan = self.plan(path)
+        if plan['angle'] % 90:
+            return None
+        return RasterPage(self._load_base(path, plan), plan['angle'])
+
+    def view_size(self, path: str) -> tuple[int, int]:
+        """Tamaño de la imagen final (recortada y girada) sin calcular sus píxeles."""
+        plan = self.plan(path)
+        size = plan['size'] or self.source_size(path)
+        return _rotated_size(plan['angle'], *size)
+
+    # Recorte automático
+    def _decode_proxy(self, path: str) -> tuple[QImage, QSize] | None:
+        """Original decodificado a lo sumo DETECT_HEIGHT de alto, junto con su tamaño real."""
+        from core.image_processor import DETECT_HEIGHT
+        reader = PageReader(path)
+        src_size = reader.size()
+        if not src_size.isValid():
+            return None
+        if src_size.height() > DETECT_HEIGHT:
+            reader.setScaledSize(QSize(max(1, round(src_size.width() * DETECT_HEIGHT / src_size.height())), DETECT_HEIGHT))
+        with span("decode_proxy"):
+            proxy = reader.read()
+        if proxy.isNull():
+            return None
+        return proxy, src_size
+
+    @staticmethod
+    def _detection_from(candidates: list, proxy: QImage, src_size: QSize) -> dict | None:
+        """Candidatos en píxeles del proxy -> detección normalizada (la mejor y el resto en 'candidates')."""
+        import numpy as np
+        if not candidates:
+            return None
+        norm = np.array([proxy.width(), proxy.height()], dtype="float32")
+        found = [{'quad': (pts / norm).tolist(), 'confidence': confidence} for pts, confidence in candidates]
+        return dict(found[0], scale=src_size.width() / float(proxy.width()), candidates=found)
+
+    def detect_document(self, path: str) -> dict | None:
+        """
+        Detecta el documento sobre el original decodificado a tamaño reducido.
+        El resultado (también "no encontrado") se guarda por archivo y no depende de la rotación.
+        """
+        from core.image_processor import detect_document, qimage_view
+        key = (path, self._file_version(path))
+        if key in self.detections:
+            return self.detections[key]
+        decoded = self._decode_proxy(path)
+        if decoded is None:
+            return None
+        proxy, src_size = decoded
+        with span("detect"):
+            found = detect_document(qimage_view(proxy))
+        detection = self._detection_from([found] if found is not None else [], proxy, src_size)
+        self.detections[key] = detection
+        return detection
+
+    def detect_documents(self, paths: list[str], top_n: int = 1) -> dict[str, dict | None]:
+        """
+        Detección por lotes: decodifica los proxies que falten y los pasa juntos por
+        DocumentDetector. Devuelve {ruta: detección}; cada una guarda hasta top_n candidatos.
+        """
+        from core.image_processor import DocumentDetector, detect_documents, qimage_view
+        results, pending = {}, []
+        for path in paths:
+            key = (path, self._file_version(path))
+            cached = self.detections.get(key, False)
+            if cached is not False and (cached is None or len(cached['candidates']) >= top_n):
+                results[path] = cached
+                continue
+            decoded = self._decode_proxy(path)
+            if decoded is None:
+                results[path] = None
+            else:
+                pending.append((path, key) + decoded)
+        if pending:
+            if self._detector is None:
+                self._detector = DocumentDetector(top_n)
+            with span("detect"):
+                found = detect_documents([qimage_view(proxy) for _, _, proxy, _ in pending], top_n, self._detector)
+            for (path, key, proxy, src_size), candidates in zip(pending, found):
+                results[path] = self.detections[key] = self._detection_from(candidates, proxy, src_size)
+        return results
+
+    def auto_crop(self, path: str) -> bool:
+        """
+        Añade un recorte automático a las operaciones de la página. Devuelve False si no se detectó documento.
+        Sin recortes previos detecta sobre el original (resultado cacheado); si ya estaba recortada,
+        sobre un proxy de la vista actual. Las esquinas se ordenan como se ven, así el giro queda dentro del warp.
+        """
+        import numpy as np
+        from core.image_processor import DETECT_HEIGHT, detect_document, order_points, qimage_view, quad_size
+        plan = self.plan(path)
+        width, height = self.view_size(path)
+        if plan['quad'] is None:
+            detection = self.detect_document(path)
+            if detection is None:
+                return False
+            source = self.source_size(path)
+            pts = np.array(detection['quad'], dtype="float32") * np.array(source, dtype="float32")
+            pts = _map_points(_view_transform(plan['angle'], *source), pts)
+        else:
+            proxy = self.render_preview_image(path, QSize(width, height).scaled(
+                QSize(DETECT_HEIGHT * 4, DETECT_HEIGHT), Qt.AspectRatioMode.KeepAspectRatio))
+            if proxy.isNull():
+                return False
+            found = detect_document(qimage_view(proxy))
+            if found is None:
+                return False
+            pts = found[0] * np.array([width / proxy.width(), height / proxy.height()], dtype="float32")
+        quad = order_points(pts)
+        self._append(path, ('quad', tuple(map(tuple, quad.tolist())), quad_size(quad)))
+        return True
+
+    def passthrough_page(self, path: str) -> JpegPage | None:
+        """JpegPage si la página es un JPEG sin recortes/filtros y múltiplo de 90°; si no, None."""
+        if not path.lower().endswith(JPEG_EXTS):
+            return None
+        plan = self.plan(path)
+        angle = plan['angle']
+        if plan['quad'] is not None or plan['filters'] or angle % 90:
+            return None
+        reader = QImageReader(path)  # Solo lee la cabecera
+        if bytes(reader.format()) not in (b"jpeg", b"jpg"):
+            return None
+        size = reader.size()
+        if not size.isValid():
+            return None
+        return JpegPage(path, angle, size)
+
+    # Previsualización
+    def _decode_reduced(self, path: str, bound: QSize | None = None, factor: float = 1.0) -> QImage:
+        """
+        Original reducido para que quepa en bound (o escalado por factor), sin decodificar
+        a resolución completa. Nunca amplía.
+        """
+        full = self.cache.get(self._cache_key(path, 0))
+        reader = None
+        if full is not None:
+            src_size = full.size()
+        else:
+            reader = PageReader(path)
+            src_size = reader.size()
+            if not src_size.isValid():
+                return reader.read()
+        if bound is not None:
+            target = src_size.scaled(bound, Qt.AspectRatioMode.KeepAspectRatio)
+        else:
+            target = QSize(max(1, round(src_size.width() * factor)), max(1, round(src_size.height() * factor)))
+        shrink = target.width() < src_size.width() or target.height() < src_size.height()
+        if full is not None:
+            if not shrink:
+                return full
+            return full.scaled(target, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        if shrink:
+            reader.setScaledSize(target)
+        with span("decode_reduced"):
+            return reader.read()
+
+    def render_preview_image(self, path: str, target_size: QSize, plan: dict | None = None) -> QImage:
+        """
+        Imagen reducida al tamaño de pantalla con la rotación aplicada.
+        Decodifica a tamaño reducido (en JPEG el escalado ocurre dentro del decodificador)
+        y rota/endereza solo la versión pequeña. No usa QPixmap, así que puede llamarse desde un hilo
+        (con el plan ya leído en el hilo GUI).
+        """
+        plan = plan or self.plan(path)
+        angle = plan['angle']
+        w, h = target_size.width(), target_size.height()
+        if w <= 0 or h <= 0:
+            return QImage()
+        if angle % 180:
+            w, h = h, w  # El tamaño objetivo antes de rotar
+        bound = QSize(w, h)
+
+        if plan['quad'] is not None:
+            # Reducir el original lo justo para que el recorte quepa en bound y enderezar el proxy
+            factor = min(w / plan['size'][0], h / plan['size'][1], 1.0)
+            proxy = self._develop(self._decode_reduced(path, factor=factor), plan)
+        else:
+            proxy = self._develop(self._decode_reduced(path, bound), plan)
+        if proxy.isNull():
+            return QImage()
+        if angle:
+            proxy = rotate_image(proxy, angle)
+        return proxy
+
+    def render_plan(self, source: QImage, plan: dict) -> QImage:
+        """
+        Aplica un plan (ver plan()) a source, que puede ser una versión reducida del original
+        (p.ej. una miniatura): recorte, filtros y giro. Sin QPixmap, así que sirve en hilos del pool.
+        """
+        image = self._develop(source, plan)
+        if plan['angle'] and not image.isNull():
+            image = rotate_image(image, plan['angle'])
+        return image
+
+    def _preview_key(self, path: str, target_size: QSize) -> tuple:
+        plan = self.plan(path)
+        return self._cache_key(path, plan['angle'], plan) + (target_size.width(), target_size.height())
+
+    def cached_preview(self, path: str, target_size: QSize) -> QPixmap | None:
+        return self.previews.get(self._preview_key(path, target_size))
+
+    def store_preview(self, path: str, target_size: QSize, img: QImage) -> QPixmap:
+        """Convierte (en el hilo GUI) y guarda el pixmap de previsualización."""
+        pm = QPixmap.fromImage(img)
+        if not pm.isNull():
+            self.previews.put(self._preview_key(path, target_size), pm)
+        return pm
+
     def render_for_label(self, path: str, target_size: QSize) -> QPixmap:
-        img = self.get_current_image(path)
+        """Pixmap para el visor; uno por (ruta, rotación, tamaño del label)."""
+        pm = self.cached_preview(path, target_size)
+        if pm is not None:
+            return pm
+        img = self.render_preview_image(path, target_size)
         if img.isNull():
             return QPixmap()
-        pm = QPixmap.fromImage(img)
-        return pm.scaled(
-            target_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
\ No newline at end of file
+        return self.store_preview(path, target_size, img)
\ No newline at end of file
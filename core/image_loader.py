@@ -1,43 +1,76 @@
 # core/image_loader.py
-import os
-from PyQt6.QtWidgets import QFileDialog
+from core.pages import expand_pages, page_name, source_file
 
-IMG_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+IMG_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp", ".pdf")
 
 class ImageLoader:
-    def __init__(self):
-        self.images = []   # rutas absolutas en orden de carga
+    def __init__(self, editor=None):
+        self.images = {}   # {ruta: None} en orden de carga; dict para buscar y quitar en O(1)
         self.names = {}    # {ruta: nombre en memoria}
+        self.editor = editor  # Si está, recibe la orientación EXIF de cada imagen nueva
+        self.session = None   # Session que guarda cada cambio, si la hay
 
     def open_dialog(self, parent):
+        from PyQt6.QtWidgets import QFileDialog  # Solo la GUI lo necesita; el modo headless no carga QtWidgets
         paths, _ = QFileDialog.getOpenFileNames(
-            parent, "Seleccionar imágenes", "", "Imágenes (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.webp)"
+            parent, "Seleccionar imágenes", "", "Imágenes y PDF (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.webp *.pdf)"
         )
-        self._add_paths(paths)
-        return paths
-
-    def add_dropped_paths(self, paths):
-        self._add_paths(paths)
-
-    def _add_paths(self, paths):
-        for p in paths:
-            if not p:
-                continue
-            if not p.lower().endswith(IMG_EXTS):
-                continue
+        return self._add_paths(paths)
+
+    def choose_folder(self, parent) -> str:
+        """Carpeta elegida por el usuario ('' si cancela); el recorrido lo hace ScanWorker."""
+        from PyQt6.QtWidgets import QFileDialog
+        return QFileDialog.getExistingDirectory(parent, "Seleccionar carpeta de imágenes")
+
+    def add_dropped_paths(self, paths, expanded: bool = False):
+        """expanded: las rutas ya vienen una por página (p.ej. de ScanWorker), no hay que abrir los TIFF/PDF."""
+        return self._add_paths(paths, expanded=expanded)
+
+    def add_ungrouped_paths(self, paths):
+        """Vuelve a poner como sueltas imágenes ya cargadas (al desagrupar): su orientación no se toca."""
+        return self._add_paths(paths, exif=False, expanded=True)
+
+    def _add_paths(self, paths, exif: bool = True, expanded: bool = False) -> list[str]:
+        """
+        Agrega las rutas nuevas y las devuelve (sin las repetidas ni las que no son imágenes).
+        Los TIFF/PDF de varias páginas entran como una ruta por página (ver core.pages); contarlas
+        abre cada archivo, así que quien las tenga ya expandidas pasa expanded=True.
+        """
+        added = []
+        paths = [p for p in paths if p and source_file(p).lower().endswith(IMG_EXTS)]
+        for p in (paths if expanded else expand_pages(paths)):
             if p not in self.images:
-                self.images.append(p)
-                self.names[p] = os.path.basename(p)
+                self.images[p] = None
+                self.names[p] = page_name(p)
+                added.append(p)
+                if exif and self.editor is not None:
+                    self.editor.apply_exif_orientation(p)  # Se lee al necesitarla
+        if self.session is not None:
+            self.session.add_images(added)
+        return added
 
     def get_name(self, path):
-        return self.names.get(path, os.path.basename(path))
+        return self.names.get(path, page_name(path))
 
     def set_name(self, path, new_name):
         if not new_name:
             return
         self.names[path] = new_name
+        if self.session is not None:
+            self.session.set_name(path, new_name)
+
+    def clear(self):
+        """Quita todas las imágenes (la sesión se vacía aparte, con Session.clear)."""
+        self.images.clear()
+        self.names.clear()
 
     def remove_path(self, path):
-        if path in self.images:
-            self.images.remove(path)
-            self.names.pop(path, None)
\ No newline at end of file
+        self.remove_paths([path])
+
+    def remove_paths(self, paths):
+        for path in paths:
+            if path in self.images:
+                del self.images[path]
+                self.names.pop(path, None)
+        if self.session is not None:
+            self.session.remove_images(paths)
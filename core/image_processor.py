@@ -1,127 +1,365 @@
 # core/image_processor.py (Actualizado)
+import sys
 import cv2
 import numpy as np
 from PyQt6.QtGui import QImage
+from PyQt6.QtCore import Qt
+from PyQt6 import sip
+from core.trace import span
+
+# Formatos que se pueden ver sin convertir: {formato: canales}
+_NATIVE_FORMATS = {
+    QImage.Format.Format_Grayscale8: 1,
+    QImage.Format.Format_BGR888: 3,
+}
+if sys.byteorder == "little":  # En memoria, RGB32/ARGB32 son B, G, R, A
+    _NATIVE_FORMATS.update({
+        QImage.Format.Format_RGB32: 4,
+        QImage.Format.Format_ARGB32: 4,
+        QImage.Format.Format_ARGB32_Premultiplied: 4,
+    })
+
+
+class _QImageArray(np.ndarray):
+    """ndarray que mantiene viva la QImage dueña de la memoria."""
+    _qimage = None
+
+
+def qimage_view(qimg: QImage) -> np.ndarray:
+    """
+    Vista NumPy de solo lectura sobre los píxeles de la QImage, sin copiar y respetando bytesPerLine.
+    Grayscale8 -> (alto, ancho); RGB32/ARGB32 -> (alto, ancho, 4) BGRA; BGR888 -> (alto, ancho, 3) BGR.
+    Otros formatos se convierten antes a RGB32 (una copia).
+    """
+    channels = _NATIVE_FORMATS.get(qimg.format())
+    if channels is None:
+        if sys.byteorder == "little":
+            qimg = qimg.convertToFormat(QImage.Format.Format_RGB32)
+        else:
+            qimg = qimg.convertToFormat(QImage.Format.Format_BGR888)
+        channels = _NATIVE_FORMATS[qimg.format()]
+    width, height, bytes_per_line = qimg.width(), qimg.height(), qimg.bytesPerLine()
+    ptr = qimg.constBits()
+    ptr.setsize(qimg.sizeInBytes())
+    if channels == 1:
+        shape, strides = (height, width), (bytes_per_line, 1)
+    else:
+        shape, strides = (height, width, channels), (bytes_per_line, channels, 1)
+    arr = np.ndarray(shape, np.uint8, buffer=ptr, strides=strides).view(_QImageArray)
+    arr.flags.writeable = False
+    arr._qimage = qimg
+    return arr
+
+
+def _release_array(arr):
+    """Qt la llama al liberar la última QImage que usa el buffer; soltar la referencia basta."""
+
+
+def array_to_qimage(arr: np.ndarray) -> QImage:
+    """
+    Array OpenCV (gris, BGR o BGRA) -> QImage que adopta el buffer del array, sin copiar.
+    Usa formatos de Qt con el mismo orden de bytes (Grayscale8, BGR888, RGB32), así que no hay cvtColor.
+    El array queda referenciado hasta que Qt libera la imagen. Las vistas de solo lectura
+    (p.ej. de qimage_view) se copian para no compartir memoria con otra QImage.
+    """
+    if arr.ndim == 2:
+        fmt = QImage.Format.Format_Grayscale8
+    elif arr.shape[2] == 3:
+        fmt = QImage.Format.Format_BGR888
+    elif sys.byteorder == "little":
+        fmt = QImage.Format.Format_RGB32
+    else:
+        arr = cv2.cvtColor(arr, cv2.COLOR_BGRA2BGR)
+        fmt = QImage.Format.Format_BGR888
+    if not arr.flags.writeable or not arr.flags.c_contiguous:
+        # sip.voidptr solo acepta buffers contiguos: los recortes con salto de fila (arr[10:20, 5:45]) se compactan
+        arr = np.ascontiguousarray(arr) if arr.flags.writeable else arr.copy()
+    height, width = arr.shape[:2]
+    return QImage(sip.voidptr(arr), width, height, arr.strides[0], fmt, _release_array, arr)
+
+
+def to_gray(arr: np.ndarray) -> np.ndarray:
+    if arr.ndim == 2:
+        return arr
+    code = cv2.COLOR_BGRA2GRAY if arr.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(arr, code)
+
 
 def qimage_to_cv2(qimg: QImage) -> np.ndarray:
-    """Convierte QImage a imagen OpenCV (BGR)."""
-    qimg = qimg.convertToFormat(QImage.Format.Format_RGB888)
-    width = qimg.width()
-    height = qimg.height()
-    ptr = qimg.bits()
-    ptr.setsize(height * width * 3)
-    arr = np.frombuffer(ptr, np.uint8).reshape(height, width, 3)
-    return cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+    """Convierte QImage a imagen OpenCV (BGR) propia; como mucho una copia."""
+    arr = qimage_view(qimg)
+    with span("qimage_to_cv2"):
+        if arr.ndim == 2:
+            return cv2.cvtColor(arr, cv2.COLOR_GRAY2BGR)
+        if arr.shape[2] == 4:
+            return cv2.cvtColor(arr, cv2.COLOR_BGRA2BGR)
+        return np.array(arr)
 
 def cv2_to_qimage(cv_img: np.ndarray) -> QImage:
     """Convierte imagen OpenCV (BGR o grayscale) a QImage."""
-    if len(cv_img.shape) == 2:  # Grayscale
-        height, width = cv_img.shape
-        bytes_per_line = width
-        return QImage(cv_img.tobytes(), width, height, bytes_per_line, QImage.Format.Format_Grayscale8)
-    else:  # BGR
-        height, width, _ = cv_img.shape
-        bytes_per_line = 3 * width
-        cv_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        return QImage(cv_img.tobytes(), width, height, bytes_per_line, QImage.Format.Format_RGB888)
+    return array_to_qimage(cv_img)
 
-def auto_crop_document(qimg: QImage) -> QImage | None:
+def color_class(qimg: QImage) -> str:
     """
-    Realiza recorte automático detectando el documento (rectángulo).
-    Devuelve la imagen recortada y enderezada si se detecta, None si no.
-    Versión mejorada con umbrales automáticos y fallback.
+    Clasifica la página con una muestra de 64x64: 'color', 'gray' o 'bilevel'
+    (texto: casi todo blanco o negro, pocos tonos medios).
     """
-    cv_img = qimage_to_cv2(qimg)
-    orig = cv_img.copy()
-    height, width = cv_img.shape[:2]
+    small = qimg.scaled(64, 64, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.FastTransformation)
+    arr = qimage_view(small)
+    if arr.ndim == 2:
+        return 'bilevel' if (((arr > 64) & (arr < 192)).mean() < 0.05) else 'gray'
+    arr = arr[:, :, :3].astype(np.int16)
+    chroma = arr.max(axis=2) - arr.min(axis=2)
+    if (chroma > 40).mean() > 0.01:
+        return 'color'
+    gray = arr.mean(axis=2)
+    mid_tones = ((gray > 64) & (gray < 192)).mean()
+    return 'bilevel' if mid_tones < 0.05 else 'gray'
 
-    # Redimensionar para procesamiento (máx altura 800px para balance)
-    ratio = height / 800.0 if height > 800 else 1.0
-    cv_img_resized = cv2.resize(cv_img, (int(width / ratio), int(height / ratio)))
+def to_grayscale(qimg: QImage) -> QImage:
+    return qimg.convertToFormat(QImage.Format.Format_Grayscale8)
+
+def to_bilevel(qimg: QImage) -> QImage:
+    """Binariza con umbral adaptativo (tolera la iluminación desigual de las fotos)."""
+    gray = qimage_view(to_grayscale(qimg))
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+    return array_to_qimage(binary)
+
+DETECT_HEIGHT = 800  # Altura máxima del proxy de detección
+
+
+def _canny_thresholds(median: float, sigma: float = 0.33) -> tuple[int, int]:
+    """Umbrales automáticos para Canny (basado en mediana)."""
+    lower = int(max(0, (1.0 - sigma) * median))
+    upper = int(min(255, (1.0 + sigma) * median))
+    return lower, upper
+
+def _quad_candidates(edged: np.ndarray, top_n: int = 1) -> list[tuple[np.ndarray, float]]:
+    """
+    Contornos convexos de 4 lados en un mapa de bordes, de mayor a menor área.
+    Devuelve hasta top_n tuplas (esquinas 4x2, fracción del área de la imagen).
+    """
+    # Encontrar contornos
+    contours, _ = cv2.findContours(edged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)  # EXTERNAL para contornos externos
+    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:15]  # Top 15 para más candidatos
 
-    def detect_contours(gray):
+    total_area = float(edged.shape[0] * edged.shape[1])
+    min_area = total_area * 0.05  # Mínimo 5% del área para ignorar ruido
+    quads = []
+    for c in contours:
+        if cv2.contourArea(c) < min_area:
+            continue
+        peri = cv2.arcLength(c, True)
+        epsilon = 0.015 * peri  # Más flexible (0.015 en lugar de 0.02)
+        approx = cv2.approxPolyDP(c, epsilon, True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):  # Chequear convexidad para documentos reales
+            quads.append((approx.reshape(4, 2).astype("float32"), cv2.contourArea(approx) / total_area))
+            if len(quads) >= top_n:
+                break
+    return quads
+
+def _detect_contours(gray, top_n: int = 1) -> list[tuple[np.ndarray, float]]:
+    with span("detect.canny"):
         # Blur suave
         gray = cv2.GaussianBlur(gray, (3, 3), 0)  # Kernel más pequeño para preservar bordes
-
-        # Umbrales automáticos para Canny (basado en mediana)
-        sigma = 0.33
-        v = np.median(gray)
-        lower = int(max(0, (1.0 - sigma) * v))
-        upper = int(min(255, (1.0 + sigma) * v))
+        lower, upper = _canny_thresholds(np.median(gray))
         edged = cv2.Canny(gray, lower, upper)
 
         # Dilatar para conectar bordes rotos
         kernel = np.ones((3, 3), np.uint8)
         edged = cv2.dilate(edged, kernel, iterations=1)
+    with span("detect.contours"):
+        return _quad_candidates(edged, top_n)
 
-        # Encontrar contornos
-        contours, _ = cv2.findContours(edged.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)  # EXTERNAL para contornos externos
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)[:15]  # Top 15 para más candidatos
-
-        screen_cnt = None
-        min_area = (gray.shape[0] * gray.shape[1]) * 0.05  # Mínimo 5% del área para ignorar ruido
-        for c in contours:
-            if cv2.contourArea(c) < min_area:
-                continue
-            peri = cv2.arcLength(c, True)
-            epsilon = 0.015 * peri  # Más flexible (0.015 en lugar de 0.02)
-            approx = cv2.approxPolyDP(c, epsilon, True)
-            if len(approx) == 4 and cv2.isContourConvex(approx):  # Chequear convexidad para documentos reales
-                screen_cnt = approx
-                break
-
-        return screen_cnt
+def _confidence(area_fraction: float, fallback: bool) -> float:
+    """Heurística 0-1: baja si hizo falta el fallback o si el documento ocupa poco."""
+    return (0.8 if fallback else 1.0) * (0.6 + 0.4 * min(1.0, area_fraction / 0.5))
 
+def detect_candidates(cv_img: np.ndarray, top_n: int = 1) -> list[tuple[np.ndarray, float]]:
+    """
+    Busca el documento en una imagen ya reducida (proxy de detección).
+    Devuelve hasta top_n candidatos (4 esquinas en píxeles del proxy, confianza 0-1), mejor primero.
+    """
     # Primer intento: Grayscale estándar
-    gray = cv2.cvtColor(cv_img_resized, cv2.COLOR_BGR2GRAY)
-    screen_cnt = detect_contours(gray)
+    with span("detect.gray"):
+        gray = to_gray(cv_img)
+    found = _detect_contours(gray, top_n)
+    fallback = False
 
     # Fallback: Si no detecta, usar adaptive thresholding para mejor contraste
-    if screen_cnt is None:
-        thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        screen_cnt = detect_contours(thresh)
+    if not found:
+        with span("detect.fallback"):
+            thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+            found = _detect_contours(thresh, top_n)
+        fallback = True
 
-    if screen_cnt is None:
-        # Debug: Guardar edged para inspección (comenta después de probar)
-        # cv2.imwrite('debug_edged.png', edged)
-        return None
+    return [(pts, _confidence(area, fallback)) for pts, area in found]
 
-    # Ordenar puntos
-    def order_points(pts: np.ndarray) -> np.ndarray:
-        rect = np.zeros((4, 2), dtype="float32")
-        s = pts.sum(axis=1)
-        rect[0] = pts[np.argmin(s)]  # TL
-        rect[2] = pts[np.argmax(s)]  # BR
-        diff = np.diff(pts, axis=1)
-        rect[1] = pts[np.argmin(diff)]  # TR
-        rect[3] = pts[np.argmax(diff)]  # BL
-        return rect
+def detect_document(cv_img: np.ndarray) -> tuple[np.ndarray, float] | None:
+    """Mejor candidato de detect_candidates, o None si no se detectó documento."""
+    candidates = detect_candidates(cv_img, 1)
+    return candidates[0] if candidates else None
 
-    # Escalar de vuelta
-    pts = screen_cnt.reshape(4, 2) * ratio
-    rect = order_points(pts)
 
-    (tl, tr, br, bl) = rect
+class DocumentDetector:
+    """
+    Detección por lotes sobre proxies del mismo tamaño.
+    Gris, blur, mediana, Canny y dilatación escriben en buffers preasignados que se
+    reutilizan entre llamadas; la conversión a gris y las medianas se hacen para
+    todo el lote a la vez.
+    """
+
+    def __init__(self, top_n: int = 1):
+        self.top_n = top_n
+        self._shape = None
+        self._kernel = np.ones((3, 3), np.uint8)
+
+    def _buffers(self, count: int, height: int, width: int):
+        if self._shape is None or self._shape[0] < count or self._shape[1:] != (height, width):
+            self._shape = (count, height, width)
+            self._gray = np.empty(self._shape, np.uint8)
+            self._blur = np.empty(self._shape, np.uint8)
+            self._edges = np.empty(self._shape, np.uint8)
+            self._dilated = np.empty(self._shape, np.uint8)
+        return self._gray[:count], self._blur[:count], self._edges[:count], self._dilated[:count]
+
+    def _medians(self, stack: np.ndarray) -> np.ndarray:
+        """Mediana de cada imagen del lote: un histograma por imagen y selección vectorizada."""
+        count = stack.shape[0]
+        hist = np.empty((count, 256), np.float32)
+        for i in range(count):
+            hist[i] = cv2.calcHist([stack[i]], [0], None, [256], [0, 256]).ravel()
+        cumulative = hist.cumsum(axis=1)
+        half = cumulative[:, -1:] / 2.0
+        lower = (cumulative < half).sum(axis=1)           # Primer valor con acumulado >= n/2
+        upper = (cumulative <= half).sum(axis=1)          # Primer valor con acumulado > n/2
+        even = (cumulative[:, -1] % 2) == 0
+        return np.where(even, (lower + upper) / 2.0, upper)
+
+    def _edges_for(self, stack: np.ndarray) -> np.ndarray:
+        count = stack.shape[0]
+        _, blur, edges, dilated = self._buffers(count, *stack.shape[1:])
+        for i in range(count):
+            cv2.GaussianBlur(stack[i], (3, 3), 0, dst=blur[i])
+        for i, median in enumerate(self._medians(blur)):
+            lower, upper = _canny_thresholds(median)
+            cv2.Canny(blur[i], lower, upper, edges=edges[i])
+            cv2.dilate(edges[i], self._kernel, dst=dilated[i], iterations=1)
+        return dilated
+
+    def detect_batch(self, stack: np.ndarray) -> list[list[tuple[np.ndarray, float]]]:
+        """
+        stack: (N, alto, ancho) en gris o (N, alto, ancho, 3|4) BGR/BGRA.
+        Devuelve, por imagen, hasta top_n candidatos (esquinas en píxeles del proxy, confianza).
+        """
+        count, height, width = stack.shape[:3]
+        gray, _, _, _ = self._buffers(count, height, width)
+        with span("detect.gray"):
+            if stack.ndim == 3:
+                np.copyto(gray, stack)
+            else:
+                # Una sola llamada a cvtColor para todo el lote: (N*alto, ancho, canales)
+                code = cv2.COLOR_BGRA2GRAY if stack.shape[3] == 4 else cv2.COLOR_BGR2GRAY
+                flat = np.ascontiguousarray(stack).reshape(count * height, width, stack.shape[3])
+                cv2.cvtColor(flat, code, dst=gray.reshape(count * height, width))
+
+        with span("detect.canny"):
+            dilated = self._edges_for(gray)
+        with span("detect.contours"):
+            results = [[(pts, _confidence(area, False)) for pts, area in _quad_candidates(dilated[i], self.top_n)]
+                       for i in range(count)]
+
+        # Fallback con umbral adaptativo solo para las que no detectaron nada
+        missing = [i for i, found in enumerate(results) if not found]
+        if missing:
+            with span("detect.fallback"):
+                thresh = np.empty((len(missing), height, width), np.uint8)
+                for j, i in enumerate(missing):
+                    cv2.adaptiveThreshold(gray[i], 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2, dst=thresh[j])
+                dilated = self._edges_for(thresh)
+                for j, i in enumerate(missing):
+                    results[i] = [(pts, _confidence(area, True)) for pts, area in _quad_candidates(dilated[j], self.top_n)]
+        return results
 
-    # Dimensiones
+
+def detect_documents(proxies: list[np.ndarray], top_n: int = 1, detector: DocumentDetector | None = None) -> list[list[tuple[np.ndarray, float]]]:
+    """
+    Detección por lotes para una lista de proxies: agrupa los de igual tamaño y canales
+    en una pila y los procesa con DocumentDetector. Mantiene el orden de entrada.
+    """
+    detector = detector or DocumentDetector(top_n)
+    detector.top_n = top_n
+    results = [None] * len(proxies)
+    by_shape = {}
+    for i, arr in enumerate(proxies):
+        by_shape.setdefault(arr.shape, []).append(i)
+    for indices in by_shape.values():
+        stack = np.stack([proxies[i] for i in indices])
+        for i, found in zip(indices, detector.detect_batch(stack)):
+            results[i] = found
+    return results
+
+def order_indices(pts: np.ndarray) -> list[int]:
+    """Índices de 4 puntos en orden TL, TR, BR, BL."""
+    s = pts.sum(axis=1)
+    diff = np.diff(pts, axis=1).ravel()
+    return [int(np.argmin(s)), int(np.argmin(diff)), int(np.argmax(s)), int(np.argmax(diff))]
+
+def order_points(pts: np.ndarray) -> np.ndarray:
+    """Ordena 4 puntos como TL, TR, BR, BL."""
+    return np.asarray(pts, dtype="float32")[order_indices(pts)]
+
+def quad_size(rect: np.ndarray) -> tuple[int, int]:
+    """Tamaño (ancho, alto) del documento enderezado para un cuadrilátero TL, TR, BR, BL."""
+    (tl, tr, br, bl) = rect
     width_a = np.sqrt(((br[0] - bl[0]) ** 2) + ((br[1] - bl[1]) ** 2))
     width_b = np.sqrt(((tr[0] - tl[0]) ** 2) + ((tr[1] - tl[1]) ** 2))
-    max_width = max(int(width_a), int(width_b))
-
     height_a = np.sqrt(((tr[0] - br[0]) ** 2) + ((tr[1] - br[1]) ** 2))
     height_b = np.sqrt(((tl[0] - bl[0]) ** 2) + ((tl[1] - bl[1]) ** 2))
-    max_height = max(int(height_a), int(height_b))
+    return max(1, max(int(width_a), int(width_b))), max(1, max(int(height_a), int(height_b)))
 
-    # Destino
+def warp_quad(cv_img: np.ndarray, rect: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    """Endereza el cuadrilátero rect (TL, TR, BR, BL) a un rectángulo de tamaño size."""
+    max_width, max_height = size
     dst = np.array([
         [0, 0],
         [max_width - 1, 0],
         [max_width - 1, max_height - 1],
         [0, max_height - 1]
     ], dtype="float32")
+    m = cv2.getPerspectiveTransform(np.asarray(rect, dtype="float32"), dst)
+    with span("warp"):
+        return cv2.warpPerspective(cv_img, m, (max_width, max_height))
 
-    # Warp
-    m = cv2.getPerspectiveTransform(rect, dst)
-    warped = cv2.warpPerspective(orig, m, (max_width, max_height))
+def unwarp_points(pts: np.ndarray, rect: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    """Inversa de warp_quad para puntos: coordenadas del rectángulo enderezado -> imagen de partida."""
+    max_width, max_height = size
+    dst = np.array([
+        [0, 0],
+        [max_width - 1, 0],
+        [max_width - 1, max_height - 1],
+        [0, max_height - 1]
+    ], dtype="float32")
+    m = cv2.getPerspectiveTransform(dst, np.asarray(rect, dtype="float32"))
+    return cv2.perspectiveTransform(np.asarray(pts, dtype="float32").reshape(-1, 1, 2), m).reshape(-1, 2)
+
+def auto_crop_document(qimg: QImage) -> QImage | None:
+    """
+    Realiza recorte automático detectando el documento (rectángulo).
+    Devuelve la imagen recortada y enderezada si se detecta, None si no.
+    Detecta sobre una copia reducida y hace un único warp a resolución completa.
+    """
+    cv_img = qimage_view(qimg)  # Sin copia; el warp final lee directamente de la QImage
+    height, width = cv_img.shape[:2]
 
-    return cv2_to_qimage(warped)
\ No newline at end of file
+    # Redimensionar para procesamiento (máx altura 800px para balance)
+    ratio = height / float(DETECT_HEIGHT) if height > DETECT_HEIGHT else 1.0
+    cv_img_resized = cv2.resize(cv_img, (int(width / ratio), int(height / ratio)))
+
+    found = detect_document(cv_img_resized)
+    if found is None:
+        return None
+
+    # Escalar de vuelta
+    rect = order_points(found[0] * ratio)
+    return array_to_qimage(warp_quad(cv_img, rect, quad_size(rect)))
@@ -0,0 +1,98 @@
+# core/pages.py
+"""
+Páginas de archivos multipágina (TIFF, PDF). Cada página es una ruta propia con la forma
+archivo#page=N (N desde 0), así ediciones, cachés, miniaturas, sesión y exportación la tratan
+como una imagen más. Al cargar solo se cuentan las páginas; cada una se decodifica al pedirla.
+"""
+import os
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QImage, QImageReader, QPainter
+
+PAGE_MARK = "#page="
+MULTIPAGE_EXTS = (".tif", ".tiff", ".pdf")
+PDF_DPI = 200  # Resolución a la que se rasterizan las páginas PDF
+
+
+def page_ref(path: str, index: int) -> str:
+    return f"{path}{PAGE_MARK}{index}"
+
+
+def split_ref(ref: str) -> tuple[str, int | None]:
+    """archivo#page=N -> (archivo, N); una ruta normal -> (ruta, None)."""
+    base, mark, index = ref.rpartition(PAGE_MARK)
+    if mark and index.isdigit():
+        return base, int(index)
+    return ref, None
+
+
+def source_file(ref: str) -> str:
+    """Archivo en disco de una ruta o página."""
+    return split_ref(ref)[0]
+
+
+def page_count(path: str) -> int:
+    """Páginas del archivo (TIFF/PDF); lee solo la estructura, no decodifica ninguna."""
+    if not path.lower().endswith(MULTIPAGE_EXTS):
+        return 1
+    return max(1, QImageReader(path).imageCount())
+
+
+def expand_pages(paths) -> list[str]:
+    """Sustituye cada archivo multipágina por sus páginas; el resto queda igual."""
+    expanded = []
+    for path in paths:
+        count = page_count(path) if split_ref(path)[1] is None else 1
+        if count > 1:
+            expanded.extend(page_ref(path, i) for i in range(count))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def page_name(ref: str) -> str:
+    """Nombre para mostrar: el del archivo, con _pN (desde 1) en las páginas."""
+    path, index = split_ref(ref)
+    name = os.path.basename(path)
+    if index is None:
+        return name
+    stem, ext = os.path.splitext(name)
+    return f"{stem}_p{index + 1}{ext}"
+
+
+class PageReader(QImageReader):
+    """
+    QImageReader de una ruta o página: salta a la página pedida y los PDF se rasterizan a PDF_DPI
+    (size() ya devuelve ese tamaño) sobre fondo blanco. setScaledSize() sigue reduciendo al decodificar.
+    """
+
+    def __init__(self, ref: str):
+        path, index = split_ref(ref)
+        super().__init__(path)
+        if index:
+            self.jumpToImage(index)
+        self._pdf = path.lower().endswith(".pdf")
+        self._size = super().size()
+        if self._pdf and self._size.isValid():
+            scale = PDF_DPI / 72.0  # El tamaño de página en PDF viene en puntos
+            self._size = QSize(max(1, round(self._size.width() * scale)), max(1, round(self._size.height() * scale)))
+            super().setScaledSize(self._size)
+
+    def size(self) -> QSize:
+        return QSize(self._size)
+
+    def read(self) -> QImage:
+        image = super().read()
+        if self._pdf and not image.isNull() and image.hasAlphaChannel():
+            # Las páginas PDF salen con fondo transparente: se componen sobre papel blanco
+            page = QImage(image.size(), QImage.Format.Format_RGB32)
+            page.fill(Qt.GlobalColor.white)
+            painter = QPainter(page)
+            painter.drawImage(0, 0, image)
+            painter.end()
+            image = page
+        return image
+
+
+def read_page(ref: str) -> QImage:
+    """Decodifica una ruta o página completa."""
+    return PageReader(ref).read()
@@ -1,83 +1,185 @@
 # core/pdf_exporter.py (Actualizado)
-import tempfile
-import os
+from io import BytesIO
 from PyQt6.QtGui import QImage
-from reportlab.pdfgen import canvas
+from PyQt6.QtCore import Qt
 from reportlab.lib.pagesizes import A4
+from core.image_editor import ImageEditor, JpegPage, RasterPage
+from core.export_profiles import DEFAULT_PROFILE, get_profile
+from core.pdf_writer import PdfImage, PdfWriter
+from core.trace import span
+
+# PIL y OpenCV se importan al exportar: crear el exportador (p.ej. al abrir la ventana) no debe cargarlos.
+# Los PDF se escriben con PdfWriter, página a página, no con el canvas de ReportLab (ver core/pdf_writer.py).
+
+
+def _pil_view(image: QImage) -> tuple[QImage, "Image.Image"]:
+    """
+    Vista PIL sobre los píxeles de la QImage, sin copiar ni codificar.
+    Devuelve también la QImage de la que depende el buffer: hay que mantenerla viva mientras se use.
+    """
+    from PIL import Image
+    if image.format() == QImage.Format.Format_Grayscale8:
+        mode = "L"
+    else:
+        image = image.convertToFormat(QImage.Format.Format_RGB888)
+        mode = "RGB"
+    ptr = image.constBits()
+    ptr.setsize(image.sizeInBytes())
+    pil = Image.frombuffer(mode, (image.width(), image.height()), ptr, "raw", mode, image.bytesPerLine(), 1)
+    return image, pil
+
+
+def _pdf_image(image: QImage, encoding: str, quality: int) -> PdfImage:
+    """Codifica los píxeles de la QImage en memoria: JPEG (DCT) o Flate, sin archivos temporales."""
+    source, pil = _pil_view(image)
+    if encoding == 'jpeg':
+        buf = BytesIO()
+        pil.save(buf, "JPEG", quality=quality)
+        return PdfImage.from_jpeg(buf.getvalue())
+    pixels = pil.tobytes()  # Copia sin el relleno de fin de fila de la QImage
+    del pil, source
+    return PdfImage.from_pixels(pixels, image.width(), image.height(), 1 if image.format() == QImage.Format.Format_Grayscale8 else 3)
+
+
+def _fit_scale(width: float, height: float, box=A4) -> float:
+    return min(box[0] / width, box[1] / height)
+
 
 class PDFExporter:
-    def __init__(self):
-        pass
+    def __init__(self, profile: str = DEFAULT_PROFILE, passthrough: bool = True):
+        self.passthrough = passthrough  # Incrustar JPEGs sin editar tal cual (DCT)
+        self.set_profile(profile)
+
+    def set_profile(self, name: str):
+        self.profile = get_profile(name)
+        self.profile_name = name
 
-    def export_image_to_pdf(self, image: QImage, save_path: str):
+    def settings(self) -> dict:
+        """Argumentos para reconstruir este exportador en otro proceso."""
+        return {'profile': self.profile_name, 'passthrough': self.passthrough}
+
+    def page_for(self, editor: ImageEditor, path: str):
         """
-        Convierte una QImage (ya procesada) en un PDF sin bordes blancos.
-        Usa archivos temporales para compatibilidad con ReportLab.
+        Página a exportar para una ruta: JpegPage si se puede incrustar tal cual, RasterPage si el
+        giro es múltiplo de 90° (va como /Rotate, sin transponer píxeles) y si no la QImage final.
         """
-        if image.isNull():
-            raise ValueError("Imagen inválida")
+        if self.passthrough:
+            page = editor.passthrough_page(path)
+            if page is not None and self._can_passthrough(page):
+                return page
+        return editor.raster_page(path) or editor.get_current_image(path)
 
-        # Crear archivo temporal
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-            temp_path = temp_file.name
-
-        # Guardar imagen en temporal
-        if not image.save(temp_path, "PNG"):
-            os.unlink(temp_path)
-            raise ValueError("No se pudo guardar la imagen temporal")
-
-        try:
-            # PDF del tamaño exacto de la imagen
-            img_width = image.width()
-            img_height = image.height()
-            c = canvas.Canvas(save_path, pagesize=(img_width, img_height))
-            c.drawImage(temp_path, 0, 0, width=img_width, height=img_height)
-            c.showPage()
-            c.save()
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+    def _can_passthrough(self, page: JpegPage) -> bool:
+        """El JPEG original sirve si el perfil no pide cambiar el color ni bajar la resolución."""
+        if self.profile['color'] in ('gray', 'bilevel'):
+            return False
+        dpi = self.profile['dpi']
+        if dpi is None:
+            return True
+        width, height = page.width(), page.height()
+        if page.rotation % 180:
+            width, height = height, width
+        return 72.0 / _fit_scale(width, height) <= dpi * 1.05
 
-        return save_path
+    def _prepare(self, image: QImage, draw_width: float, draw_height: float) -> tuple[QImage, str]:
+        """Aplica el perfil a una página: remuestreo a la resolución objetivo, color y codificación."""
+        from core.image_processor import color_class, to_grayscale, to_bilevel
+        dpi = self.profile['dpi']
+        if dpi:
+            target_width = max(1, round(draw_width / 72.0 * dpi))
+            target_height = max(1, round(draw_height / 72.0 * dpi))
+            if image.width() > target_width or image.height() > target_height:
+                with span("resample"):
+                    image = image.scaled(
+                        target_width, target_height,
+                        Qt.AspectRatioMode.IgnoreAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation
+                    )
 
-    def export_images_to_pdf(self, images: list[QImage], save_path: str):
+        with span("color"):
+            color = self.profile['color']
+            if color == 'auto':
+                color = color_class(image)
+            if color == 'gray':
+                image = to_grayscale(image)
+            elif color == 'bilevel':
+                image = to_bilevel(image)
+
+        # JPEG deforma los bordes del texto bitonal y además ocupa más
+        encoding = 'flate' if color == 'bilevel' else self.profile['encoding']
+        return image, encoding
+
+    def _encode(self, page, width: float, height: float) -> PdfImage:
+        """Imagen codificada de una página que se dibujará en width x height puntos."""
+        if isinstance(page, JpegPage):
+            return PdfImage.from_jpeg(page.path)  # Los bytes DCT se copian tal cual al escribir
+        if isinstance(page, RasterPage):
+            page = page.image
+        image, encoding = self._prepare(page, width, height)
+        return _pdf_image(image, encoding, self.profile['jpeg_quality'])
+
+    def _add_page(self, writer: PdfWriter, page, page_size, box, rotation: int):
+        with span("encode"):
+            encoded = self._encode(page, box[2], box[3])
+        with span("draw"):  # La página va al archivo ya, no se acumula
+            writer.add_page(encoded, page_size, box, rotation)
+
+    def export_image_to_pdf(self, image, save_path: str):
         """
-        Crea un PDF multi-página de varias QImages, escalando a A4 sin bordes extras.
+        Convierte una QImage (ya procesada), RasterPage o JpegPage en un PDF sin bordes blancos.
+        Sin DPI en el perfil, 1 px = 1 pt; con DPI, la página es la imagen ajustada a A4.
         """
-        if not images:
-            raise ValueError("No hay imágenes para exportar")
+        if not isinstance(image, JpegPage) and image.isNull():
+            raise ValueError("Imagen inválida")
 
-        c = canvas.Canvas(save_path, pagesize=A4)
-        pdf_width, pdf_height = A4
+        img_width = image.width()
+        img_height = image.height()
+        rotation = getattr(image, 'rotation', 0)
+        if self.profile['dpi']:
+            shown = (img_height, img_width) if rotation % 180 else (img_width, img_height)
+            scale = _fit_scale(*shown)
+        else:
+            scale = 1.0
+        draw_width = img_width * scale
+        draw_height = img_height * scale
+        # Con /Rotate 90/270 el visor gira la página: el MediaBox es el de la imagen sin girar
+        pagesize = (draw_width, draw_height)
+        with PdfWriter(save_path) as writer:
+            self._add_page(writer, image, pagesize, (0, 0, draw_width, draw_height), rotation)
+            with span("pdf_write"):
+                writer.close()
 
-        temp_paths = []
-        try:
+        return save_path
+
+    def export_images_to_pdf(self, images, save_path: str):
+        """
+        Crea un PDF multi-página de varias QImages/RasterPages/JpegPages, escalando a A4 sin bordes extras.
+        Acepta cualquier iterable (p.ej. un generador): cada página se codifica, se escribe al archivo
+        y se libera antes de pedir la siguiente, así la memoria no crece con el número de páginas.
+        """
+        with PdfWriter(save_path) as writer:
             for image in images:
-                if image.isNull():
+                if not isinstance(image, JpegPage) and image.isNull():
                     continue
 
-                # Temporal
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                    temp_path = temp_file.name
-                if not image.save(temp_path, "PNG"):
-                    continue
-                temp_paths.append(temp_path)
+                # Con /Rotate 90/270 el MediaBox queda apaisado y se ve como A4 vertical
+                rotation = getattr(image, 'rotation', 0)
+                pdf_width, pdf_height = (A4[1], A4[0]) if rotation % 180 else A4
 
                 # Escalar a A4 manteniendo aspect ratio
                 img_width = image.width()
                 img_height = image.height()
-                scale = min(pdf_width / img_width, pdf_height / img_height)
+                scale = _fit_scale(img_width, img_height, (pdf_width, pdf_height))
                 draw_width = img_width * scale
                 draw_height = img_height * scale
                 x = (pdf_width - draw_width) / 2
                 y = (pdf_height - draw_height) / 2
-                c.drawImage(temp_path, x, y, width=draw_width, height=draw_height)
-                c.showPage()
+                self._add_page(writer, image, (pdf_width, pdf_height), (x, y, draw_width, draw_height), rotation)
+                del image  # Soltar la página antes de que el iterable decodifique la siguiente
 
-            c.save()
-        finally:
-            for tp in temp_paths:
-                if os.path.exists(tp):
-                    os.unlink(tp)
+            if not writer.page_count:
+                raise ValueError("No hay imágenes para exportar")
+            with span("pdf_write"):
+                writer.close()
 
-        return save_path
\ No newline at end of file
+        return save_path
@@ -0,0 +1,138 @@
+# core/pdf_writer.py
+"""
+PDF de solo imágenes escrito página a página: cada imagen y su página van al archivo en cuanto
+llegan y en memoria solo quedan las posiciones de los objetos (tabla xref). El canvas de ReportLab
+guarda todas las páginas hasta save(), así que con grupos grandes la memoria crecía con cada página.
+"""
+import os
+import shutil
+import zlib
+from io import BytesIO
+
+COLOR_SPACES = {1: b"/DeviceGray", 3: b"/DeviceRGB", 4: b"/DeviceCMYK"}
+
+
+def _num(value: float) -> bytes:
+    text = b"%.4f" % value
+    return text.rstrip(b"0").rstrip(b".") if b"." in text else text
+
+
+class PdfImage:
+    """
+    Imagen ya codificada para el PDF. data son los bytes del stream o la ruta de un archivo
+    que se copia tal cual al escribir (JPEG original), sin leerlo entero a memoria.
+    """
+
+    def __init__(self, width: int, height: int, components: int, filter_name: bytes, data):
+        self.width = width
+        self.height = height
+        self.components = components
+        self.filter_name = filter_name
+        self.data = data
+
+    @classmethod
+    def from_jpeg(cls, source):
+        """JPEG (ruta o bytes) incrustado como DCT; solo se lee la cabecera."""
+        from reportlab.pdfbase.pdfutils import readJPEGInfo
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                width, height, components = readJPEGInfo(f)[:3]
+        else:
+            width, height, components = readJPEGInfo(BytesIO(source))[:3]
+        return cls(width, height, components, b"/DCTDecode", source)
+
+    @classmethod
+    def from_pixels(cls, pixels: bytes, width: int, height: int, components: int):
+        """Píxeles de 8 bits por canal, sin relleno entre filas, comprimidos con Flate."""
+        return cls(width, height, components, b"/FlateDecode", zlib.compress(pixels, 6))
+
+
+class PdfWriter:
+    """
+    Se escribe en archivo.part y se renombra en close(): un error a medio grupo no deja un PDF roto.
+    Usar con with: si algo falla, abort() borra el archivo a medias.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._part = path + ".part"
+        self._file = open(self._part, "wb")
+        self._offsets = []  # Posición de cada objeto; el número de objeto es el índice + 1
+        self._pages = []    # Números de objeto de las páginas
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._pages_num = self._reserve()  # El árbol de páginas va al final, pero las páginas ya lo citan
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+    def _reserve(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets)
+
+    def _start(self, num: int | None = None) -> int:
+        if num is None:
+            num = self._reserve()
+        self._offsets[num - 1] = self._file.tell()
+        self._file.write(b"%d 0 obj\n" % num)
+        return num
+
+    def _write_object(self, body: bytes, num: int | None = None) -> int:
+        num = self._start(num)
+        self._file.write(body + b"\nendobj\n")
+        return num
+
+    def _write_stream(self, entries: bytes, data) -> int:
+        num = self._start()
+        length = os.path.getsize(data) if isinstance(data, str) else len(data)
+        self._file.write(b"<< %s /Length %d >>\nstream\n" % (entries, length))
+        if isinstance(data, str):
+            with open(data, "rb") as f:
+                shutil.copyfileobj(f, self._file)
+        else:
+            self._file.write(data)
+        self._file.write(b"\nendstream\nendobj\n")
+        return num
+
+    def add_page(self, image: PdfImage, page_size, box, rotation: int = 0):
+        """Página de page_size puntos con la imagen en box (x, y, ancho, alto); rotation va como /Rotate."""
+        entries = b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent 8 /Filter %s" % (
+            image.width, image.height, COLOR_SPACES[image.components], image.filter_name)
+        if image.components == 4 and image.filter_name == b"/DCTDecode":
+            entries += b" /Decode [1 0 1 0 1 0 1 0]"  # JPEG CMYK de Adobe (invertido), igual que ReportLab
+        xobject = self._write_stream(entries, image.data)
+        x, y, width, height = box
+        content = b"q %s 0 0 %s %s %s cm /Im0 Do Q" % (_num(width), _num(height), _num(x), _num(y))
+        contents = self._write_stream(b"", content)
+        self._pages.append(self._write_object(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] /Rotate %d "
+            b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>" % (
+                self._pages_num, _num(page_size[0]), _num(page_size[1]), rotation % 360, xobject, contents)))
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def close(self):
+        """Escribe el árbol de páginas, el catálogo y la tabla xref, y deja el PDF en su sitio."""
+        kids = b" ".join(b"%d 0 R" % num for num in self._pages)
+        self._write_object(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)), self._pages_num)
+        catalog = self._write_object(b"<< /Type /Catalog /Pages %d 0 R >>" % self._pages_num)
+        xref = self._file.tell()
+        self._file.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self._offsets) + 1))
+        for offset in self._offsets:
+            self._file.write(b"%010d 00000 n \n" % offset)
+        self._file.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(self._offsets) + 1, catalog, xref))
+        self._file.close()
+        os.replace(self._part, self.path)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.unlink(self._part)
+        except OSError:
+            pass
@@ -0,0 +1,120 @@
+# core/process_pool.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, CancelledError
+from core.image_cache import ImageCache
+from core.image_editor import ImageEditor
+from core import trace
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+# --- Serialización de páginas para los workers ---
+
+def page_spec(editor: ImageEditor, path: str, auto_crop: bool = False) -> dict:
+    """Estado de edición de una página (lista de operaciones, sin píxeles) listo para un worker."""
+    edits = editor.edits_for(path)
+    return {
+        'path': path,
+        'edits': edits,
+        'auto_crop': auto_crop and not any(op[0] == 'quad' for op in edits),
+    }
+
+
+def worker_editor(pages: list[dict]) -> ImageEditor:
+    """ImageEditor sin caché (cada página se usa una vez) con las operaciones de las páginas."""
+    editor = ImageEditor(cache=ImageCache(0), previews=ImageCache(0))
+    for page in pages:
+        editor.set_edits(page['path'], page['edits'])
+    return editor
+
+
+# --- Lado del worker (proceso separado) ---
+
+_cancel_event = None
+
+
+def _init_worker(cancel_event):
+    global _cancel_event
+    _cancel_event = cancel_event
+
+
+def _run_traced(fn, item):
+    """fn(item) junto con los spans que registró, para juntarlos con los del proceso principal."""
+    return fn(item), trace.drain()
+
+
+def check_cancel():
+    """Llamar entre pasos largos dentro de una tarea para abortar pronto si se canceló."""
+    if _cancel_event is not None and _cancel_event.is_set():
+        raise TaskCancelled()
+
+
+# --- Lado del llamador ---
+
+class PoolRunner:
+    """
+    Reparte tareas en un pool de procesos con cancelación.
+    map() bloquea hasta terminar, así que desde la GUI debe llamarse en un hilo aparte.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._ctx = multiprocessing.get_context("spawn")  # Qt no es seguro con fork
+        self._cancel = self._ctx.Event()
+        self._futures = []
+
+    def cancel(self):
+        """Las tareas pendientes no arrancan y las que están en curso abortan en su próximo check_cancel()."""
+        self._cancel.set()
+        for fut in self._futures:
+            fut.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def map(self, fn, items: list, label, on_result=None, on_progress=None, on_error=None) -> list[str]:
+        """
+        Ejecuta fn(item) para cada ítem. label(item) da el nombre para mensajes.
+        on_result(item, resultado), on_progress(hechos, nombre) y on_error(nombre, mensaje)
+        se llaman desde el hilo de map() a medida que termina cada ítem.
+        Devuelve la lista de errores "nombre: mensaje".
+        """
+        errors = []
+        if not items:
+            return errors
+        workers = max(1, min(self.max_workers, len(items)))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._cancel,),
+        ) as pool:
+            futures = {pool.submit(_run_traced, fn, item): item for item in items}
+            self._futures = list(futures)
+            if self._cancel.is_set():
+                self.cancel()
+            done = 0
+            for fut in as_completed(futures):
+                item = futures[fut]
+                name = label(item)
+                try:
+                    result, events = fut.result()
+                    trace.merge(events)
+                except (CancelledError, TaskCancelled):
+                    continue
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+                    if on_error:
+                        on_error(name, str(e))
+                else:
+                    if on_result:
+                        on_result(item, result)
+                done += 1
+                if on_progress:
+                    on_progress(done, name)
+        self._futures = []
+        return errors
@@ -0,0 +1,182 @@
+# core/session.py
+import json
+import os
+import sqlite3
+from PyQt6.QtGui import QColor
+from core.pages import page_name, source_file
+from core.thumbnail_cache import APP_DIR
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (path TEXT PRIMARY KEY, pos INTEGER NOT NULL, name TEXT);
+CREATE TABLE IF NOT EXISTS groups (gid INTEGER PRIMARY KEY, pos INTEGER NOT NULL, name TEXT NOT NULL,
+                                   color TEXT NOT NULL, paths TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS edits (path TEXT PRIMARY KEY, ops TEXT NOT NULL);
+"""
+
+
+def default_session_path() -> str:
+    """$XDG_DATA_HOME/gestor-documentos/session.sqlite (por defecto ~/.local/share)."""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, APP_DIR, "session.sqlite")
+
+
+def _as_tuple(value):
+    """JSON devuelve listas; las operaciones de edición son tuplas (se usan como clave de caché)."""
+    return tuple(_as_tuple(v) for v in value) if isinstance(value, list) else value
+
+
+class Session:
+    """
+    Espacio de trabajo en SQLite: imágenes sueltas, nombres, grupos y operaciones de edición.
+    Cada cambio se escribe en su propia transacción pequeña (WAL), nunca se reescribe el archivo entero.
+    ImageLoader, GroupHandler e ImageEditor llaman aquí si tienen una sesión asignada.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or default_session_path()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            self.db = self._connect()
+        except sqlite3.DatabaseError:
+            # Archivo dañado: se aparta para no perderlo y se empieza una sesión vacía
+            os.replace(self.path, self.path + ".corrupt")
+            self.db = self._connect()
+        self._gids = {}  # {id(grupo): gid}
+        row = self.db.execute("SELECT MAX(pos) FROM (SELECT pos FROM images UNION ALL SELECT pos FROM groups)").fetchone()
+        self._pos = (row[0] or 0) + 1  # Orden de la lista: las filas nuevas siempre van al final
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # WAL ya protege ante caídas del programa
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(f"Versión de sesión desconocida: {version}")
+        db.executescript(_SCHEMA)
+        db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        return db
+
+    def _next_pos(self, count: int = 1) -> int:
+        pos = self._pos
+        self._pos += count
+        return pos
+
+    # --- Imágenes sueltas ---
+    def add_images(self, paths: list[str]):
+        if not paths:
+            return
+        start = self._next_pos(len(paths))
+        with self.db:
+            # name NULL = nombre por defecto (page_name), igual que al cargarla
+            self.db.executemany("INSERT OR REPLACE INTO images (path, pos, name) VALUES (?, ?, NULL)",
+                                ((p, start + i) for i, p in enumerate(paths)))
+
+    def remove_images(self, paths):
+        with self.db:
+            self.db.executemany("DELETE FROM images WHERE path = ?", ((p,) for p in paths))
+
+    def set_name(self, path: str, name: str):
+        with self.db:
+            self.db.execute("UPDATE images SET name = ? WHERE path = ?", (name, path))
+
+    # --- Grupos ---
+    def add_group(self, group: dict):
+        with self.db:
+            cur = self.db.execute("INSERT INTO groups (pos, name, color, paths) VALUES (?, ?, ?, ?)",
+                                  (self._next_pos(), group['name'], group['color'].name(QColor.NameFormat.HexArgb),
+                                   json.dumps(group['paths'])))
+        self._gids[id(group)] = cur.lastrowid
+
+    def remove_group(self, group: dict):
+        gid = self._gids.pop(id(group), None)
+        if gid is not None:
+            with self.db:
+                self.db.execute("DELETE FROM groups WHERE gid = ?", (gid,))
+
+    def set_group_name(self, group: dict, name: str):
+        gid = self._gids.get(id(group))
+        if gid is not None:
+            with self.db:
+                self.db.execute("UPDATE groups SET name = ? WHERE gid = ?", (name, gid))
+
+    # --- Ediciones ---
+    def set_edits(self, path: str, edits: tuple):
+        # Se guarda también la lista vacía: al restaurar indica que no hay que volver a aplicar el EXIF
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO edits (path, ops) VALUES (?, ?)", (path, json.dumps(edits)))
+
+    def clear(self):
+        """Vacía la sesión (Nueva sesión): el próximo arranque empieza sin imágenes."""
+        with self.db:
+            self.db.execute("DELETE FROM images")
+            self.db.execute("DELETE FROM groups")
+            self.db.execute("DELETE FROM edits")
+        self._gids = {}
+        self._pos = 1
+
+    # --- Restaurar ---
+    def _drop_missing(self):
+        """Quita las imágenes cuyo archivo ya no existe (y los grupos que se quedan vacíos)."""
+        exists = {}  # {archivo: bool}; las páginas de un mismo TIFF/PDF se comprueban una vez
+
+        def present(path):
+            file = source_file(path)
+            if file not in exists:
+                exists[file] = os.path.exists(file)
+            return exists[file]
+
+        gone = [(path,) for (path,) in self.db.execute("SELECT path FROM images") if not present(path)]
+        groups = []  # (gid, rutas que quedan)
+        for gid, paths in self.db.execute("SELECT gid, paths FROM groups"):
+            paths = json.loads(paths)
+            kept = [p for p in paths if present(p)]
+            if len(kept) != len(paths):
+                groups.append((gid, kept))
+        with self.db:
+            self.db.executemany("DELETE FROM images WHERE path = ?", gone)
+            for gid, kept in groups:
+                if kept:
+                    self.db.execute("UPDATE groups SET paths = ? WHERE gid = ?", (json.dumps(kept), gid))
+                else:
+                    self.db.execute("DELETE FROM groups WHERE gid = ?", (gid,))
+
+    def restore(self, loader, group_handler, editor) -> list[dict]:
+        """
+        Rellena loader, group_handler y editor con lo guardado y les asigna la sesión.
+        Devuelve las filas de la lista en su orden. Solo comprueba que los archivos sigan existiendo,
+        no abre ninguna imagen: la orientación EXIF de las páginas sin ediciones guardadas queda
+        pendiente, como al cargarlas.
+        """
+        self._drop_missing()
+        with self.db:
+            # Ediciones de imágenes que ya no están en la sesión
+            self.db.execute("DELETE FROM edits WHERE path NOT IN (SELECT path FROM images) "
+                            "AND path NOT IN (SELECT value FROM groups, json_each(groups.paths))")
+        rows = []  # (pos, fila)
+        for path, pos, name in self.db.execute("SELECT path, pos, name FROM images"):
+            loader.images[path] = None
+            loader.names[path] = name or page_name(path)
+            rows.append((pos, {'type': 'single', 'path': path}))
+        for gid, pos, name, color, paths in self.db.execute("SELECT gid, pos, name, color, paths FROM groups"):
+            group = {'name': name, 'paths': json.loads(paths), 'color': QColor(color)}
+            group_handler.groups[id(group)] = group
+            self._gids[id(group)] = gid
+            rows.append((pos, {'type': 'group', 'group': group}))
+        rows.sort(key=lambda r: r[0])
+
+        stored = {path: _as_tuple(json.loads(ops)) for path, ops in self.db.execute("SELECT path, ops FROM edits")}
+        for _, entry in rows:
+            for path in ([entry['path']] if entry['type'] == 'single' else entry['group']['paths']):
+                if path in stored:
+                    editor.set_edits(path, stored[path])
+                else:
+                    editor.apply_exif_orientation(path)
+
+        # Los datos ya están dentro: a partir de aquí cada cambio se guarda
+        loader.session = group_handler.session = editor.session = self
+        return [entry for _, entry in rows]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,73 @@
+# core/startup.py
+"""
+Arranque rápido: la ventana se abre sin NumPy, OpenCV ni PIL,
+y warm_up() los importa en segundo plano una vez pintada. report() resume cuánto tardó.
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+
+STARTUP_BUDGET_MS = 1500  # Hasta la primera ventana pintada
+REPORT_ENV = "GESTOR_STARTUP_REPORT"
+
+# En orden: los que antes se necesitan (ver y recortar) primero
+HEAVY_MODULES = (
+    "numpy",
+    "cv2",
+    "core.image_processor",
+    "PIL.Image",
+    "core.process_pool",
+)
+
+_warm_times = {}  # {módulo: ms} importados por warm_up
+
+
+def heavy_loaded() -> list[str]:
+    """Módulos pesados que ya están importados."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def warm_up(modules=HEAVY_MODULES) -> threading.Thread:
+    """
+    Importa los módulos en un hilo aparte. Si la GUI pide uno a mitad de camino,
+    el import de Python la hace esperar a que termine en lugar de cargarlo dos veces.
+    """
+    def run():
+        for name in modules:
+            if name in sys.modules:
+                continue
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue  # Ya fallará con su mensaje cuando se use
+            _warm_times[name] = (time.perf_counter() - start) * 1000
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def report(first_paint_ms: float, loaded_before: list[str]) -> str:
+    lines = [f"Primera ventana en {first_paint_ms:.0f} ms (presupuesto {STARTUP_BUDGET_MS} ms)"]
+    lines.append("Módulos pesados antes de la ventana: " + (", ".join(loaded_before) or "ninguno"))
+    for name, ms in _warm_times.items():
+        lines.append(f"  precarga {name:<28}{ms:>8.0f} ms")
+    return "\n".join(lines)
+
+
+def check_startup(start: float, loaded_before: list[str], warm_thread: threading.Thread | None = None) -> float:
+    """
+    Se llama con la ventana ya pintada; start es time.perf_counter() al arrancar el proceso.
+    Avisa por stderr si se pasó del presupuesto. Con GESTOR_STARTUP_REPORT=1 imprime siempre el
+    informe, esperando antes a la precarga para incluir sus tiempos.
+    """
+    first_paint_ms = (time.perf_counter() - start) * 1000
+    verbose = os.environ.get(REPORT_ENV, "") not in ("", "0")
+    if verbose and warm_thread is not None:
+        warm_thread.join()
+    if verbose or first_paint_ms > STARTUP_BUDGET_MS:
+        print(report(first_paint_ms, loaded_before), file=sys.stderr)
+    return first_paint_ms
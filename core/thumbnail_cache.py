@@ -0,0 +1,72 @@
+# core/thumbnail_cache.py
+import hashlib
+import os
+import tempfile
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QImage
+from core.pages import PageReader, source_file
+
+THUMB_SIZE = 96  # Lado máximo de las miniaturas en píxeles
+APP_DIR = "gestor-documentos"
+
+
+def default_cache_dir() -> str:
+    """$XDG_CACHE_HOME/gestor-documentos/thumbnails (por defecto ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, APP_DIR, "thumbnails")
+
+
+class ThumbnailCache:
+    """
+    Miniaturas en disco, una por (ruta, mtime, tamaño del archivo, lado).
+    Se guardan del original sin editar: recorte, filtros y giro se aplican al mostrarlas.
+    Solo usa QImage, así que puede llamarse desde hilos del pool.
+    """
+
+    def __init__(self, directory: str | None = None, size: int = THUMB_SIZE):
+        self.directory = directory or default_cache_dir()
+        self.size = size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _file_for(self, path: str) -> str | None:
+        try:
+            st = os.stat(source_file(path))
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{self.size}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+    def load(self, path: str) -> QImage | None:
+        """Miniatura ya guardada o None."""
+        thumb_file = self._file_for(path)
+        if thumb_file is None or not os.path.exists(thumb_file):
+            return None
+        img = QImage(thumb_file)
+        return None if img.isNull() else img
+
+    def render(self, path: str) -> QImage:
+        """Decodifica a tamaño reducido (en JPEG el escalado ocurre dentro del decodificador)."""
+        reader = PageReader(path)
+        src_size = reader.size()
+        if src_size.isValid():
+            bound = QSize(self.size, self.size)
+            if src_size.width() > self.size or src_size.height() > self.size:
+                reader.setScaledSize(src_size.scaled(bound, Qt.AspectRatioMode.KeepAspectRatio))
+        return reader.read()
+
+    def get(self, path: str) -> QImage:
+        """Miniatura desde disco o, si falta, renderizada y guardada."""
+        img = self.load(path)
+        if img is not None:
+            return img
+        img = self.render(path)
+        thumb_file = self._file_for(path)
+        if not img.isNull() and thumb_file is not None:
+            # Escribir aparte y renombrar: otro hilo nunca lee un archivo a medias
+            fd, tmp = tempfile.mkstemp(suffix=".jpg", dir=self.directory)
+            os.close(fd)
+            if img.save(tmp, "JPEG", 85):
+                os.replace(tmp, thumb_file)
+            else:
+                os.unlink(tmp)
+        return img
@@ -0,0 +1,164 @@
+# core/trace.py
+"""
+Spans de tiempo y memoria para el camino caliente (decode, detección, warp, codificación, PDF).
+Desactivados por defecto: span() devuelve entonces un objeto vacío compartido y no mide nada.
+Se activan con enable() o con la variable de entorno GESTOR_TRACE=1, que heredan los workers.
+"""
+import json
+import os
+import threading
+import time
+
+ENV_VAR = "GESTOR_TRACE"
+
+enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+
+# Eventos registrados en este proceso: (nombre, documento, inicio_ns, duración_ns, pid, tid, rss_bytes)
+_events = []
+_lock = threading.Lock()
+_local = threading.local()  # Documento en curso por hilo
+_page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss() -> int:
+    """Memoria residente actual del proceso (0 si no hay /proc)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _page_size
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.monotonic_ns()  # Reloj común a todos los procesos en Linux
+        return self
+
+    def __exit__(self, *exc):
+        end = time.monotonic_ns()
+        event = (self.name, getattr(_local, "document", None), self.start, end - self.start,
+                 os.getpid(), threading.get_ident(), _rss())
+        with _lock:
+            _events.append(event)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """with span("decode"): ... — mide el bloque si el trazado está activo."""
+    return _Span(name) if enabled else _NO_SPAN
+
+
+class document:
+    """Marca los spans del bloque como parte de un documento (y lo mide como un span más)."""
+    __slots__ = ("name", "_span", "_previous")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if not enabled:
+            return self
+        self._previous = getattr(_local, "document", None)
+        _local.document = self.name
+        self._span = _Span("document").__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if enabled:
+            self._span.__exit__(*exc)
+            _local.document = self._previous
+        return False
+
+
+def enable(on: bool = True):
+    """Activa o desactiva el trazado aquí y en los procesos que se creen a partir de ahora."""
+    global enabled
+    enabled = on
+    os.environ[ENV_VAR] = "1" if on else "0"
+
+
+def drain() -> list[tuple]:
+    """Devuelve y borra los eventos de este proceso (p.ej. para mandarlos desde un worker)."""
+    global _events
+    with _lock:
+        events, _events = _events, []
+    return events
+
+
+def merge(events: list[tuple]):
+    """Incorpora eventos traídos de otro proceso."""
+    if events:
+        with _lock:
+            _events.extend(events)
+
+
+def events() -> list[tuple]:
+    with _lock:
+        return list(_events)
+
+
+# --- Informes ---
+def summary(evts: list[tuple] | None = None) -> dict[str, dict]:
+    """{etapa: {'count', 'total_ms', 'mean_ms', 'max_ms', 'max_rss_mb'}} ordenado por tiempo total."""
+    stats = {}
+    for name, _, _, dur, _, _, rss in (events() if evts is None else evts):
+        s = stats.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'max_rss_mb': 0.0})
+        s['count'] += 1
+        s['total_ms'] += dur / 1e6
+        s['max_ms'] = max(s['max_ms'], dur / 1e6)
+        s['max_rss_mb'] = max(s['max_rss_mb'], rss / 2**20)
+    for s in stats.values():
+        s['mean_ms'] = s['total_ms'] / s['count']
+    return dict(sorted(stats.items(), key=lambda item: -item[1]['total_ms']))
+
+
+def by_document(evts: list[tuple] | None = None) -> dict[str, dict[str, float]]:
+    """{documento: {etapa: ms}}: en qué se fue el tiempo de cada PDF."""
+    docs = {}
+    for name, doc, _, dur, _, _, _ in (events() if evts is None else evts):
+        if doc is not None:
+            stages = docs.setdefault(doc, {})
+            stages[name] = stages.get(name, 0.0) + dur / 1e6
+    return docs
+
+
+def format_summary(evts: list[tuple] | None = None) -> str:
+    lines = [f"{'etapa':<24}{'n':>7}{'total ms':>12}{'media ms':>11}{'máx ms':>10}{'RSS MB':>9}"]
+    for name, s in summary(evts).items():
+        lines.append(f"{name:<24}{s['count']:>7}{s['total_ms']:>12.1f}{s['mean_ms']:>11.2f}"
+                     f"{s['max_ms']:>10.1f}{s['max_rss_mb']:>9.0f}")
+    return "\n".join(lines)
+
+
+def write_chrome_trace(path: str, evts: list[tuple] | None = None):
+    """JSON en formato Chrome Trace (chrome://tracing, Perfetto): un carril por proceso e hilo y la RSS."""
+    trace_events = []
+    for name, doc, start, dur, pid, tid, rss in (events() if evts is None else evts):
+        event = {'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': dur / 1e3, 'pid': pid, 'tid': tid}
+        if doc is not None:
+            event['args'] = {'document': doc}
+        trace_events.append(event)
+        if rss:
+            trace_events.append({'name': 'rss', 'ph': 'C', 'ts': (start + dur) / 1e3, 'pid': pid,
+                                 'args': {'MB': round(rss / 2**20, 1)}})
+    with open(path, "w") as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms',
+                   'otherData': {'documents': by_document(evts)}}, f)
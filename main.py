@@ -1,14 +1,31 @@
 # main.py
+import time
+_START = time.perf_counter()  # Antes de cualquier import pesado: mide el arranque completo
+
 import sys
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import MainWindow
+from core import startup, trace
+
+TRACE_FILE = "gestor-trace.json"  # Con GESTOR_TRACE=1, traza de la sesión al cerrar
+
+
+def _after_first_paint():
+    loaded_before = startup.heavy_loaded()
+    startup.check_startup(_START, loaded_before, startup.warm_up())
 
 
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
+    QTimer.singleShot(0, _after_first_paint)  # Corre cuando el bucle de eventos ya pintó la ventana
+    code = app.exec()
+    if trace.enabled:
+        print(trace.format_summary(), file=sys.stderr)
+        trace.write_chrome_trace(TRACE_FILE)
+    sys.exit(code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+# ui/crop_worker.py
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.batch_crop import BatchCropper
+
+
+class CropWorker(QThread):
+    """Hilo que alimenta el pool de recorte automático y entrega cada resultado a la GUI."""
+    progress = pyqtSignal(int, str)     # ítems terminados, ruta del último
+    cropped = pyqtSignal(str, object)   # ruta, nuevas operaciones de edición
+    item_failed = pyqtSignal(str, str)  # ruta, mensaje de error
+
+    def __init__(self, tasks: list[dict], max_workers: int | None = None, parent=None):
+        super().__init__(parent)
+        self.tasks = tasks
+        self.cropper = BatchCropper(max_workers)
+        self.not_detected = []
+        self.skipped = []
+        self.errors = []
+
+    def run(self):
+        self.not_detected = self.cropper.run(
+            self.tasks,
+            on_cropped=self.cropped.emit,
+            on_progress=self.progress.emit,
+            on_error=self.item_failed.emit,
+        )
+        self.errors = self.cropper.errors
+        self.skipped = self.cropper.skipped
+
+    def cancel(self):
+        self.cropper.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cropper.cancelled
@@ -0,0 +1,196 @@
+# ui/document_model.py
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QBrush, QColor
+from core.pages import page_name
+
+RESET_RANGES = 32  # Con más tramos que estos, borrar reconstruye la lista de una vez
+DUPLICATE_MARK = "⚠ "  # Delante del nombre de las filas con un posible duplicado
+DUPLICATE_COLOR = QColor(200, 90, 0)
+
+
+class DocumentModel(QAbstractListModel):
+    """
+    Filas de la lista: imágenes sueltas {'type': 'single', 'path'} y grupos {'type': 'group', 'group'}.
+    Las filas viven en una lista ordenada con un índice {clave: fila} que se reconstruye
+    solo cuando se consulta tras un borrado, así buscar es O(1) y las altas/bajas van en bloque.
+    """
+
+    def __init__(self, loader, group_handler, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.group_handler = group_handler
+        self._entries = []
+        self._rows = {}    # {clave: fila}; None si hay que reconstruirlo
+        self._icons = {}   # {clave: QIcon} miniaturas puestas por la vista
+        self._duplicates = {}  # {ruta: ruta original} marcadas por el buscador de duplicados
+
+    # --- Claves e índice ---
+    @staticmethod
+    def key_of(entry: dict):
+        return entry['path'] if entry['type'] == 'single' else id(entry['group'])
+
+    def _index(self) -> dict:
+        if self._rows is None:
+            self._rows = {self.key_of(e): row for row, e in enumerate(self._entries)}
+        return self._rows
+
+    def row_of(self, key) -> int:
+        """Fila de una ruta suelta o de id(grupo); -1 si no está."""
+        return self._index().get(key, -1)
+
+    def entry(self, row: int) -> dict | None:
+        if 0 <= row < len(self._entries):
+            return self._entries[row]
+        return None
+
+    def path_of(self, row: int) -> str | None:
+        """Ruta que se muestra para la fila (la primera página en los grupos)."""
+        entry = self.entry(row)
+        if entry is None:
+            return None
+        if entry['type'] == 'single':
+            return entry['path']
+        paths = entry['group']['paths']
+        return paths[0] if paths else None
+
+    def paths_of(self, rows) -> list[str]:
+        """Rutas de las filas (los grupos aportan todas sus imágenes)."""
+        paths = []
+        for row in rows:
+            entry = self._entries[row]
+            if entry['type'] == 'single':
+                paths.append(entry['path'])
+            else:
+                paths.extend(entry['group']['paths'])
+        return paths
+
+    def duplicate_of(self, entry: dict) -> str | None:
+        """Original del que la fila es (o contiene) un posible duplicado."""
+        if not self._duplicates:
+            return None
+        if entry['type'] == 'single':
+            return self._duplicates.get(entry['path'])
+        for path in entry['group']['paths']:
+            if path in self._duplicates:
+                return self._duplicates[path]
+        return None
+
+    # --- QAbstractListModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return entry
+        if role == Qt.ItemDataRole.DisplayRole:
+            mark = DUPLICATE_MARK if self.duplicate_of(entry) else ""
+            if entry['type'] == 'single':
+                return mark + self.loader.get_name(entry['path'])
+            group = entry['group']
+            return f"{mark}Grupo: {self.group_handler.get_group_name(group)} [{len(group['paths'])} imgs]"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            tip = entry['path'] if entry['type'] == 'single' else "\n".join(entry['group']['paths'])
+            original = self.duplicate_of(entry)
+            return f"{tip}\nPosible duplicado de: {page_name(original)}\n{original}" if original else tip
+        if role == Qt.ItemDataRole.ForegroundRole and self.duplicate_of(entry):
+            return QBrush(DUPLICATE_COLOR)
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._icons.get(self.key_of(entry))
+        if role == Qt.ItemDataRole.BackgroundRole and entry['type'] == 'group':
+            return QBrush(entry['group']['color'])  # Color para diferenciar
+        return None
+
+    # --- Altas y bajas en bloque ---
+    def _append(self, entries: list[dict]):
+        if not entries:
+            return
+        start = len(self._entries)
+        self.beginInsertRows(QModelIndex(), start, start + len(entries) - 1)
+        self._entries.extend(entries)
+        if self._rows is not None:
+            for row, e in enumerate(entries, start):
+                self._rows[self.key_of(e)] = row
+        self.endInsertRows()
+
+    def append_entries(self, entries: list[dict]):
+        """Filas ya armadas (p.ej. las de una sesión restaurada), en una sola inserción."""
+        self._append(list(entries))
+
+    def append_paths(self, paths: list[str]):
+        self._append([{'type': 'single', 'path': p} for p in paths])
+
+    def append_group(self, group: dict) -> int:
+        self._append([{'type': 'group', 'group': group}])
+        return len(self._entries) - 1
+
+    def remove_rows(self, rows):
+        """Quita varias filas: por tramos contiguos o, si están muy dispersas, reconstruyendo la lista."""
+        rows = sorted(set(r for r in rows if 0 <= r < len(self._entries)), reverse=True)
+        if not rows:
+            return
+        ranges = []  # (primera, última) de mayor a menor
+        for row in rows:
+            if ranges and ranges[-1][0] == row + 1:
+                ranges[-1] = (row, ranges[-1][1])
+            else:
+                ranges.append((row, row))
+        for row in rows:
+            self._icons.pop(self.key_of(self._entries[row]), None)
+        if len(ranges) > RESET_RANGES:
+            gone = set(rows)
+            self.beginResetModel()
+            self._entries = [e for row, e in enumerate(self._entries) if row not in gone]
+            self.endResetModel()
+        else:
+            for first, last in ranges:
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self._entries[first:last + 1]
+                self.endRemoveRows()
+        self._rows = None
+
+    def clear(self):
+        self.beginResetModel()
+        self._entries = []
+        self._rows = {}
+        self._icons = {}
+        self._duplicates = {}
+        self.endResetModel()
+
+    # --- Cambios en una fila ---
+    def refresh_row(self, row: int):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def set_duplicates(self, changes: dict):
+        """Marca ({ruta: original}) o desmarca ({ruta: None}) posibles duplicados."""
+        grouped = False
+        for path, original in changes.items():
+            if original is None:
+                self._duplicates.pop(path, None)
+            else:
+                self._duplicates[path] = original
+            row = self.row_of(path)
+            if row >= 0:
+                self.refresh_row(row)
+            else:
+                grouped = True  # Imagen dentro de un grupo (o ya quitada)
+        if grouped and self._entries:
+            self.dataChanged.emit(self.index(0), self.index(len(self._entries) - 1))
+
+    def icon_keys(self) -> list:
+        return list(self._icons)
+
+    def set_icon(self, key, icon):
+        """Pone (o quita con None) la miniatura de una fila."""
+        if icon is None:
+            if self._icons.pop(key, None) is None:
+                return
+        else:
+            self._icons[key] = icon
+        row = self.row_of(key)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
@@ -0,0 +1,82 @@
+# ui/duplicate_finder.py
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from core.duplicates import HashStore, DuplicateIndex
+
+CHUNK_SIZE = 64  # Rutas por trabajo del pool
+
+
+class _HashSignals(QObject):
+    done = pyqtSignal(list)  # [(ruta, hash o None)]
+
+
+class _HashJob(QRunnable):
+    """Lee del disco o calcula los hashes de un bloque de rutas, fuera del hilo GUI."""
+
+    def __init__(self, store, paths):
+        super().__init__()
+        self.store = store
+        self.paths = paths
+        self.signals = _HashSignals()
+
+    def run(self):
+        self.signals.done.emit(self.store.hashes(self.paths))
+
+
+class DuplicateFinder(QObject):
+    """
+    Hash perceptual de cada imagen cargada, calculado en un pool de hilos y guardado en disco.
+    Cada vez que cambia qué imágenes son duplicados emite changed({ruta: original o None}).
+    """
+
+    changed = pyqtSignal(dict)
+
+    def __init__(self, store: HashStore | None = None, parent=None):
+        super().__init__(parent)
+        self.store = store or HashStore()
+        self.index = DuplicateIndex()
+        self._loaded = {}  # {ruta: orden de carga}; los resultados de las ya quitadas se descartan
+        self._next = 0
+        self._jobs = set()
+        self._pool = QThreadPool(self)  # Propio: no retrasa miniaturas ni el visor
+
+    def add_paths(self, paths):
+        new = [p for p in paths if p not in self._loaded]
+        for path in new:
+            # El orden se fija aquí, no al terminar el hash: los trabajos acaban en cualquier orden
+            self._loaded[path] = self._next
+            self._next += 1
+        for i in range(0, len(new), CHUNK_SIZE):
+            job = _HashJob(self.store, new[i:i + CHUNK_SIZE])
+            job.setAutoDelete(False)
+            job.signals.done.connect(lambda results, job=job: self._on_hashed(job, results))
+            self._jobs.add(job)
+            self._pool.start(job)
+
+    def remove_paths(self, paths):
+        changes = {}
+        for path in paths:
+            self._loaded.pop(path, None)
+            if path in self.index.duplicate_of:
+                changes[path] = None
+            changes.update(self.index.remove(path))
+        if changes:
+            self.changed.emit(changes)
+
+    def clear(self):
+        """Olvida todas las rutas; los trabajos en curso se descartan al llegar."""
+        self._loaded = {}
+        self.index = DuplicateIndex()
+
+    def _on_hashed(self, job, results):
+        self._jobs.discard(job)
+        changes = {}
+        for path, value in results:
+            if value is None or path not in self._loaded:
+                continue
+            changes.update(self.index.add(path, value, self._loaded[path]))
+        if changes:
+            self.changed.emit(changes)
+
+    def duplicates(self) -> dict:
+        """{ruta: original} de los duplicados encontrados hasta ahora."""
+        return dict(self.index.duplicate_of)
@@ -0,0 +1,29 @@
+# ui/export_worker.py
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.batch_export import BatchExporter
+
+
+class ExportWorker(QThread):
+    """Hilo que alimenta el pool de exportación y reenvía el progreso a la GUI."""
+    progress = pyqtSignal(int, str)     # ítems terminados, nombre del último
+    item_failed = pyqtSignal(str, str)  # nombre, mensaje de error
+
+    def __init__(self, jobs: list[dict], max_workers: int | None = None, parent=None):
+        super().__init__(parent)
+        self.jobs = jobs
+        self.exporter = BatchExporter(max_workers)
+        self.errors = []
+
+    def run(self):
+        self.errors = self.exporter.run(
+            self.jobs,
+            on_progress=self.progress.emit,
+            on_error=self.item_failed.emit,
+        )
+
+    def cancel(self):
+        self.exporter.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.exporter.cancelled
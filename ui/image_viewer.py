@@ -1,13 +1,61 @@
 # ui/image_viewer.py
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QSizePolicy
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QSize, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
 from core.image_editor import ImageEditor
 
+RESIZE_DEBOUNCE_MS = 120  # Espera tras el último resize antes del render suave
+PREFETCH_PRIORITY = -1    # Por detrás del render de la página actual en el pool
+
+
+class _PreviewSignals(QObject):
+    done = pyqtSignal(int, str, QSize, QImage)  # generación, ruta, tamaño, imagen
+
+
+class _PreviewJob(QRunnable):
+    """
+    Renderiza la previsualización (decode + rotación + escalado suave) fuera del hilo GUI.
+    El plan de edición se lee al crear el trabajo, en el hilo GUI: leerlo puede tocar el estado del editor.
+    """
+
+    def __init__(self, editor, path, size, generation):
+        super().__init__()
+        self.editor = editor
+        self.path = path
+        self.size = size
+        self.generation = generation
+        self.plan = editor.plan(path)
+        self.signals = _PreviewSignals()
+
+    def run(self):
+        img = self.editor.render_preview_image(self.path, self.size, self.plan)
+        self.signals.done.emit(self.generation, self.path, self.size, img)
+
+
+class _PrefetchJob(_PreviewJob):
+    """Previsualización de una página vecina; se salta si la navegación ya pidió otras."""
+
+    def __init__(self, viewer, path, size, generation):
+        super().__init__(viewer.editor, path, size, generation)
+        self.viewer = viewer
+        self.key = viewer.editor._preview_key(path, size)  # Estado de edición al pedirla
+
+    def run(self):
+        if self.generation != self.viewer._prefetch_generation:
+            return
+        super().run()
+
+
 class ImageViewer(QWidget):
     def __init__(self):
         super().__init__()
         self.editor = ImageEditor()
         self.current_path = None
+        self._last_pixmap = None  # Último render suave, base para el escalado rápido
+        self._generation = 0      # Descarta resultados de renders obsoletos
+        self._jobs = set()
+        self._prefetch_generation = 0
+        self._prefetch_jobs = {}  # {(ruta, generación): trabajo}
 
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
@@ -23,6 +71,12 @@ class ImageViewer(QWidget):
         layout.addWidget(self.preview_label, stretch=1)
         self.setLayout(layout)
 
+        # Agrupa los resize de un arrastre en un solo render
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self._resize_timer.timeout.connect(self._render_async)
+
     def set_image(self, path: str):
         self.current_path = path
         self.refresh()
@@ -34,14 +88,74 @@ class ImageViewer(QWidget):
         self.refresh()
 
     def refresh(self):
+        self._generation += 1
+        self._resize_timer.stop()
         if not self.current_path:
+            self._last_pixmap = None
             self.preview_label.clear()
             self.preview_label.setText("Aquí se mostrará la imagen")
             return
         pixmap = self.editor.render_for_label(self.current_path, self.preview_label.size())
+        self._last_pixmap = pixmap
         self.preview_label.setPixmap(pixmap)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        # Reescalar la imagen al tamaño actual del label
-        self.refresh()
+        if not self.current_path:
+            return
+        # Mientras se arrastra: escalado rápido del último pixmap
+        if self._last_pixmap is not None and not self._last_pixmap.isNull():
+            self.preview_label.setPixmap(self._last_pixmap.scaled(
+                self.preview_label.size(),
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.FastTransformation
+            ))
+        self._resize_timer.start()
+
+    def _render_async(self):
+        """Render suave al tamaño final en un hilo del pool; se muestra al terminar."""
+        if not self.current_path:
+            return
+        self._generation += 1
+        size = self.preview_label.size()
+        cached = self.editor.cached_preview(self.current_path, size)
+        if cached is not None:
+            self._last_pixmap = cached
+            self.preview_label.setPixmap(cached)
+            return
+        job = _PreviewJob(self.editor, self.current_path, size, self._generation)
+        job.signals.done.connect(self._on_preview_ready)
+        self._jobs.add(job)
+        QThreadPool.globalInstance().start(job)
+
+    def _on_preview_ready(self, generation, path, size, img):
+        self._jobs = {j for j in self._jobs if j.generation > generation}
+        if generation != self._generation or path != self.current_path or img.isNull():
+            return
+        pixmap = self.editor.store_preview(path, size, img)
+        self._last_pixmap = pixmap
+        self.preview_label.setPixmap(pixmap)
+
+    def prefetch(self, paths):
+        """
+        Renderiza en segundo plano las previsualizaciones de paths al tamaño actual del visor,
+        para que al navegar a ellas se muestren desde la caché. Cancela los prefetch anteriores.
+        """
+        self._prefetch_generation += 1
+        self._prefetch_jobs = {}  # Los pendientes se saltarán solos al ver la generación nueva
+        size = self.preview_label.size()
+        for path in paths:
+            if not path or path == self.current_path or self.editor.cached_preview(path, size) is not None:
+                continue
+            job = _PrefetchJob(self, path, size, self._prefetch_generation)
+            job.signals.done.connect(self._on_prefetched)
+            self._prefetch_jobs[(path, job.generation)] = job
+            QThreadPool.globalInstance().start(job, PREFETCH_PRIORITY)
+
+    def _on_prefetched(self, generation, path, size, img):
+        job = self._prefetch_jobs.pop((path, generation), None)
+        # Descartar si la página se editó mientras tanto o si ya la renderizó el visor
+        if img.isNull() or job is None or self.editor._preview_key(path, size) != job.key:
+            return
+        if self.editor.cached_preview(path, size) is None:
+            self.editor.store_preview(path, size, img)
@@ -2,21 +2,27 @@
 import os
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QListWidget, QPushButton, QSplitter, QFileDialog, QMessageBox, QListWidgetItem, QApplication, QProgressDialog
+    QAbstractItemView, QPushButton, QSplitter, QFileDialog, QMessageBox, QProgressDialog, QComboBox
 )
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QBrush
 from ui.image_viewer import ImageViewer
 from ui.rename_panel import RenamePanel
+from ui.thumbnail_list import ThumbnailList
+from ui.document_model import DocumentModel, DUPLICATE_MARK
+from ui.duplicate_finder import DuplicateFinder
 from core.image_loader import ImageLoader, IMG_EXTS
 from core.shortcuts import setup_shortcuts
 from core.pdf_exporter import PDFExporter
+from core.export_profiles import PROFILES
 from core.group_handler import GroupHandler
-from core.image_processor import auto_crop_document
+from ui.scan_worker import ScanWorker
+from core.session import Session
+
+PREFETCH_RADIUS = 2  # Páginas anteriores y siguientes que se renderizan por adelantado
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, session_path: str | None = None):
         super().__init__()
         self.setWindowTitle("Gestor de Documentos - Fase 4")
         self.setGeometry(100, 100, 1200, 700)
@@ -25,18 +31,31 @@ class MainWindow(QMainWindow):
         self.loader = ImageLoader()
         self.group_handler = GroupHandler()  # Nuevo: Maneja grupos
         self.pdf_exporter = PDFExporter()
-        self.viewer = ImageViewer()
+        self.pool_workers = None  # Procesos para exportar/recortar en lote (None = todos los núcleos)
+        self._export_worker = None
+        self._crop_worker = None
+        self._scan_worker = None
 
         # --- Widgets UI ---
-        self.list_widget = QListWidget()
-        self.list_widget.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)  # Multi-select para agrupar
+        self.model = DocumentModel(self.loader, self.group_handler, self)
+        self.list_view = ThumbnailList()
+        self.list_view.setModel(self.model)
+        self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)  # Multi-select para agrupar
         self.viewer = ImageViewer()
+        self.loader.editor = self.viewer.editor  # Aplicar la orientación EXIF al cargar
+        self.list_view.editor = self.viewer.editor  # Miniaturas con las ediciones de cada página
+        self.viewer.editor.listeners.append(self.list_view.refresh_thumbnail)  # Giros, recortes y filtros
         self.rename_panel = RenamePanel()
+        self.duplicates = DuplicateFinder(parent=self)  # Marca en la lista las imágenes repetidas
+        self.duplicates.changed.connect(self.model.set_duplicates)
 
         # Botones
         load_button = QPushButton("Abrir imágenes")
         load_button.clicked.connect(self.load_images)
 
+        folder_button = QPushButton("Abrir carpeta")
+        folder_button.clicked.connect(self.load_folder)
+
         self.create_group_btn = QPushButton("Crear Grupo")
         self.create_group_btn.clicked.connect(self.create_group)
 
@@ -49,27 +68,39 @@ class MainWindow(QMainWindow):
         self.export_all_btn = QPushButton("Exportar todos a PDFs")
         self.export_all_btn.clicked.connect(self.export_all_to_pdfs)
 
+        # Perfil de compresión para las exportaciones
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(list(PROFILES))
+        self.profile_combo.setCurrentText(self.pdf_exporter.profile_name)
+        self.profile_combo.setToolTip("Perfil de exportación (resolución, calidad JPEG, color)")
+        self.profile_combo.currentTextChanged.connect(self.pdf_exporter.set_profile)
+
         self.delete_btn = QPushButton("Eliminar")
         self.delete_btn.clicked.connect(self.delete_current)
 
+        self.new_session_btn = QPushButton("Nueva sesión")
+        self.new_session_btn.setToolTip("Vaciar la lista para empezar otro trabajo (los archivos no se tocan)")
+        self.new_session_btn.clicked.connect(self.new_session)
+
         # Panel izquierdo
         left_layout = QVBoxLayout()
         left_layout.setContentsMargins(0, 0, 0, 0)
-        left_layout.addWidget(self.list_widget)
+        left_layout.addWidget(self.list_view)
         left_layout.addWidget(load_button)
+        left_layout.addWidget(folder_button)
         left_layout.addWidget(self.create_group_btn)
         left_layout.addWidget(self.ungroup_btn)
+        left_layout.addWidget(self.profile_combo)
         left_layout.addWidget(self.export_current_btn)
         left_layout.addWidget(self.export_all_btn)
         left_layout.addWidget(self.delete_btn)
+        left_layout.addWidget(self.new_session_btn)
         left_widget = QWidget()
         left_widget.setLayout(left_layout)
 
         # Panel derecho
         right_layout = QVBoxLayout()
         right_layout.setContentsMargins(0, 0, 0, 0)
-        right_layout.addWidget(self.viewer, stretch=1)
-        right_layout.addWidget(self.rename_panel, stretch=0)
         right_widget = QWidget()
         right_widget.setLayout(right_layout)
 
@@ -82,6 +113,14 @@ class MainWindow(QMainWindow):
         self.auto_crop_btn.clicked.connect(self.auto_crop_current)
         edit_layout.addWidget(self.auto_crop_btn)
 
+        self.crop_selection_btn = QPushButton("Recortar selección")
+        self.crop_selection_btn.clicked.connect(self.auto_crop_selection)
+        edit_layout.addWidget(self.crop_selection_btn)
+
+        self.crop_all_btn = QPushButton("Recortar todo")
+        self.crop_all_btn.clicked.connect(self.auto_crop_all)
+        edit_layout.addWidget(self.crop_all_btn)
+
         # Placeholder para más botones en futuras subfases
         edit_layout.addStretch()
 
@@ -104,82 +143,144 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(container)
 
         # Conexiones
-        self.list_widget.itemClicked.connect(self.on_item_clicked)
+        self.list_view.clicked.connect(self.on_item_clicked)
         self.rename_panel.rename_signal.connect(self.on_rename)
         self.rename_panel.prev_signal.connect(self.show_previous)
         self.rename_panel.next_signal.connect(self.show_next)
-        self.rename_panel.rotate_left_signal.connect(lambda: self.viewer.rotate(-90))
-        self.rename_panel.rotate_right_signal.connect(lambda: self.viewer.rotate(90))
+        self.rename_panel.rotate_left_signal.connect(lambda: self.rotate_current(-90))
+        self.rename_panel.rotate_right_signal.connect(lambda: self.rotate_current(90))
 
         setup_shortcuts(
             self,
-            rotate_left_cb=lambda: self.viewer.rotate(-90),
-            rotate_right_cb=lambda: self.viewer.rotate(90),
+            rotate_left_cb=lambda: self.rotate_current(-90),
+            rotate_right_cb=lambda: self.rotate_current(90),
         )
 
         self.setAcceptDrops(True)
 
+        # Sesión: recupera el trabajo anterior y guarda cada cambio a partir de aquí
+        self.session = Session(session_path)
+        self.model.append_entries(self.session.restore(self.loader, self.group_handler, self.viewer.editor))
+        self.duplicates.add_paths(self.model.paths_of(range(self.model.rowCount())))
+        if self.model.rowCount():
+            self._show_index(0)
+
     # Carga y selección
     def load_images(self):
         paths = self.loader.open_dialog(self)
         self._append_list_items(paths)
-        if paths and self.list_widget.currentRow() == -1:
-            self.list_widget.setCurrentRow(0)
+        if paths and self._current_row() == -1:
+            self._show_index(0)
+
+    def load_folder(self):
+        folder = self.loader.choose_folder(self)
+        if folder:
+            self._scan_folders([folder])
+
+    def _scan_folders(self, folders):
+        """Recorre las carpetas en otro hilo y va agregando las imágenes a la lista por lotes."""
+        if self._scan_worker is not None:
+            self._scan_worker.folders.extend(folders)  # Se recorren al terminar las actuales
+            return
+        progress = QProgressDialog("Buscando imágenes...", "Cancelar", 0, 0, self)
+        progress.setWindowTitle("Abrir carpeta")
+        progress.setWindowModality(Qt.WindowModality.NonModal)  # La lista se puede usar mientras llega
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.show()
+
+        worker = ScanWorker(list(folders), parent=self)
+        worker.batch_found.connect(self._on_scan_batch)
+        worker.progress.connect(lambda found: progress.setLabelText(f"Encontradas {found} imágenes"))
+        progress.canceled.connect(worker.cancel)
+        progress.canceled.connect(lambda: progress.setLabelText("Cancelando..."))
+        worker.finished.connect(lambda: self._on_scan_finished(progress))
+        self._scan_worker = worker  # Mantener referencia mientras corre
+        worker.start()
+
+    def _on_scan_batch(self, paths):
+        if self._scan_worker is None or self._scan_worker.cancelled:
+            return  # Lotes que ya estaban en cola al cancelar (o al empezar una sesión nueva)
+        self._append_list_items(self.loader.add_dropped_paths(paths, expanded=True))  # Expandidas en ScanWorker
+        if self._current_row() == -1 and self.model.rowCount():
             self._show_index(0)
 
+    def _on_scan_finished(self, progress):
+        pending = self._scan_worker.pending  # Soltadas justo cuando el hilo terminaba
+        progress.canceled.disconnect()
+        progress.close()
+        self._scan_worker = None
+        if pending:
+            self._scan_folders(pending)
+
     def _append_list_items(self, paths):
-        for p in paths:
-            name = self.loader.get_name(p)
-            item = QListWidgetItem(name)
-            item.setToolTip(p)
-            item.setData(Qt.ItemDataRole.UserRole, {'type': 'single', 'path': p})  # Marcar como single
-            self.list_widget.addItem(item)
+        self.model.append_paths(paths)  # Una sola inserción para todo el bloque
+        self.duplicates.add_paths(paths)
+
+    def _current_row(self) -> int:
+        index = self.list_view.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def _selected_rows(self) -> list[int]:
+        return [index.row() for index in self.list_view.selectionModel().selectedRows()]
 
-    def on_item_clicked(self, item):
-        index = self.list_widget.row(item)
-        self._show_index(index)
+    def on_item_clicked(self, index):
+        self._show_index(index.row())
 
     def _show_index(self, index: int):
-        if 0 <= index < self.list_widget.count():
-            item = self.list_widget.item(index)
-            data = item.data(Qt.ItemDataRole.UserRole)
-            if data['type'] == 'single':
-                path = data['path']
-                self.viewer.set_image(path)
-                self.rename_panel.set_name(self.loader.get_name(path))
-            elif data['type'] == 'group':
-                group = data['group']
-                first_path = group['paths'][0] if group['paths'] else None
-                if first_path:
-                    self.viewer.set_image(first_path)
-                self.rename_panel.set_name(self.group_handler.get_group_name(group))
-            self.list_widget.setCurrentRow(index)
+        data = self.model.entry(index)
+        if data is None:
+            return
+        if data['type'] == 'single':
+            path = data['path']
+            self.viewer.set_image(path)
+            self.rename_panel.set_name(self.loader.get_name(path))
+        elif data['type'] == 'group':
+            group = data['group']
+            first_path = group['paths'][0] if group['paths'] else None
+            if first_path:
+                self.viewer.set_image(first_path)
+            self.rename_panel.set_name(self.group_handler.get_group_name(group))
+        self.list_view.setCurrentIndex(self.model.index(index))
+        self._prefetch_around(index)
+
+    def _prefetch_around(self, index: int):
+        """Adelanta el render de las páginas vecinas (y de las primeras del grupo actual) para navegar sin esperas."""
+        paths = []
+        data = self.model.entry(index)
+        if data['type'] == 'group':
+            paths.extend(data['group']['paths'][1:PREFETCH_RADIUS + 1])
+        # Primero las siguientes: es el sentido habitual al renombrar
+        neighbours = [index + d for d in range(1, PREFETCH_RADIUS + 1)] + [index - d for d in range(1, PREFETCH_RADIUS + 1)]
+        for row in neighbours:
+            if 0 <= row < self.model.rowCount():
+                paths.append(self.model.path_of(row))
+        self.viewer.prefetch(paths)
+
+    def rotate_current(self, angle: int):
+        self.viewer.rotate(angle)
 
     # Renombrado
     def on_rename(self, new_name: str):
-        idx = self.list_widget.currentRow()
-        if idx < 0 or idx >= self.list_widget.count():
+        idx = self._current_row()
+        data = self.model.entry(idx)
+        if data is None:
             return
-        item = self.list_widget.item(idx)
-        data = item.data(Qt.ItemDataRole.UserRole)
         if data['type'] == 'single':
-            path = data['path']
-            self.loader.set_name(path, new_name)
-            item.setText(new_name)
+            self.loader.set_name(data['path'], new_name)
         elif data['type'] == 'group':
-            group = data['group']
-            self.group_handler.set_group_name(group, new_name)
-            item.setText(f"Grupo: {new_name} [{len(group['paths'])} imgs]")
+            self.group_handler.set_group_name(data['group'], new_name)
+        self.model.refresh_row(idx)
 
     # Navegación
     def show_previous(self):
-        idx = self.list_widget.currentRow()
+        idx = self._current_row()
         if idx > 0:
             self._show_index(idx - 1)
 
     def show_next(self):
-        idx = self.list_widget.currentRow()
-        if idx < len(self.loader.images) - 1:
+        idx = self._current_row()
+        if idx < self.model.rowCount() - 1:
             self._show_index(idx + 1)
 
     # Keyboard navigation
@@ -198,29 +299,32 @@ class MainWindow(QMainWindow):
             event.acceptProposedAction()
 
     def dropEvent(self, event):
-        paths = []
+        paths, folders = [], []
         for url in event.mimeData().urls():
             p = url.toLocalFile()
-            if p and p.lower().endswith(IMG_EXTS):
+            if not p:
+                continue
+            if os.path.isdir(p):
+                folders.append(p)
+            elif p.lower().endswith(IMG_EXTS):
                 paths.append(p)
-        if not paths:
-            return
-        self.loader.add_dropped_paths(paths)
-        self._append_list_items(paths)
-        if self.list_widget.currentRow() == -1:
-            self.list_widget.setCurrentRow(0)
-            self._show_index(0)
+        if paths:
+            self._append_list_items(self.loader.add_dropped_paths(paths))
+            if self._current_row() == -1:
+                self._show_index(0)
+        if folders:
+            self._scan_folders(folders)
 
     # Exportación Individual
     def export_current_to_pdf(self):
-            idx = self.list_widget.currentRow()
+            idx = self._current_row()
             if idx < 0:
                 QMessageBox.warning(self, "Sin selección", "No hay nada seleccionado.")
                 return
 
-            item = self.list_widget.item(idx)
-            data = item.data(Qt.ItemDataRole.UserRole)
-            name = item.text().split("[")[0].strip() if '[' in item.text() else item.text()  # Limpio para grupos
+            data = self.model.entry(idx)
+            text = self.model.data(self.model.index(idx)).removeprefix(DUPLICATE_MARK)
+            name = text.split("[")[0].strip() if '[' in text else text  # Limpio para grupos
 
             default_filename = f"{name}.pdf" if name else "documento.pdf"
 
@@ -236,12 +340,12 @@ class MainWindow(QMainWindow):
                 try:
                     if data['type'] == 'single':
                         path = data['path']
-                        image = self.viewer.editor.get_current_image(path)
+                        image = self.pdf_exporter.page_for(self.viewer.editor, path)
                         self.pdf_exporter.export_image_to_pdf(image, save_path)
                     elif data['type'] == 'group':
                         group = data['group']
                         paths = group['paths']
-                        images = [self.viewer.editor.get_current_image(p) for p in paths]
+                        images = (self.pdf_exporter.page_for(self.viewer.editor, p) for p in paths)  # Una página a la vez
                         self.pdf_exporter.export_images_to_pdf(images, save_path)
                     QMessageBox.information(self, "Éxito", f"PDF guardado en:\n{save_path}")
                 except Exception as e:
@@ -258,78 +362,61 @@ class MainWindow(QMainWindow):
         if not output_dir:
             return
 
+        from core.batch_export import build_jobs  # El pool de procesos se carga al primer lote
+        from ui.export_worker import ExportWorker
+        jobs = build_jobs(self.loader, self.group_handler, self.viewer.editor, output_dir, self.pdf_exporter.settings())
+
         progress = QProgressDialog("Exportando PDFs...", "Cancelar", 0, total_items, self)
         progress.setWindowTitle("Exportando")
         progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setValue(0)
         progress.show()
 
-        errors = []
-        count = 0
-
-        # Export sueltas
-        for path in self.loader.images[:]:  # Copia para evitar mod
-            if progress.wasCanceled():
-                break
-            progress.setValue(count)
-            progress.setLabelText(f"Exportando {count+1}/{total_items} (suelta)")
-            QApplication.processEvents()
-
-            name = self.loader.get_name(path)
-            if not name:
-                name = f"documento_{count + 1}"
-            save_path = os.path.join(output_dir, f"{name}.pdf")
-            try:
-                image = self.viewer.editor.get_current_image(path)
-                self.pdf_exporter.export_image_to_pdf(image, save_path)
-            except Exception as e:
-                errors.append(f"{name}: {e}")
-            count += 1
-
-        # Export grupos
-        for group in self.group_handler.groups:
-            if progress.wasCanceled():
-                break
-            progress.setValue(count)
-            progress.setLabelText(f"Exportando {count+1}/{total_items} (grupo)")
-            QApplication.processEvents()
-
-            name = self.group_handler.get_group_name(group)
-            if not name:
-                name = f"grupo_{count + 1}"
-            save_path = os.path.join(output_dir, f"{name}.pdf")
-            try:
-                paths = group['paths']
-                images = [self.viewer.editor.get_current_image(p) for p in paths]
-                self.pdf_exporter.export_images_to_pdf(images, save_path)
-            except Exception as e:
-                errors.append(f"{name}: {e}")
-            count += 1
-
-        progress.setValue(total_items)
+        worker = ExportWorker(jobs, self.pool_workers, self)
+        worker.progress.connect(
+            lambda done, name: (progress.setValue(done), progress.setLabelText(f"Exportado {done}/{total_items}: {name}"))
+        )
+        worker.item_failed.connect(lambda name, msg: progress.setLabelText(f"Error en {name}: {msg}"))
+        progress.canceled.connect(worker.cancel)
+        progress.canceled.connect(lambda: progress.setLabelText("Cancelando..."))
+        worker.finished.connect(lambda: self._on_export_all_finished(worker, progress, output_dir))
+        self._export_worker = worker  # Mantener referencia mientras corre
+        worker.start()
+
+    def _on_export_all_finished(self, worker, progress, output_dir):
+        cancelled = worker.cancelled  # Leer antes de close(): cerrar el diálogo emite canceled
+        progress.canceled.disconnect()
+        progress.close()
+        self._export_worker = None
+        errors = worker.errors
 
         if errors:
             error_msg = "Algunos PDFs fallaron:\n" + "\n".join(errors[:10])
             if len(errors) > 10:
                 error_msg += f"\n... y {len(errors) - 10} más"
             QMessageBox.warning(self, "Advertencia", error_msg)
+        elif cancelled:
+            QMessageBox.information(self, "Cancelado", "Exportación cancelada.")
         else:
             QMessageBox.information(self, "Éxito", f"Todos exportados a:\n{output_dir}")
 
     # Crear Grupo
     def create_group(self):
-        selected_items = self.list_widget.selectedItems()
-        if len(selected_items) < 2:
+        selected_rows = self._selected_rows()
+        if len(selected_rows) < 2:
             QMessageBox.warning(self, "Selección", "Selecciona al menos 2 imágenes para agrupar.")
             return
 
         paths = []
         indices_to_remove = []
-        for item in selected_items:
-            data = item.data(Qt.ItemDataRole.UserRole)
+        for row in sorted(selected_rows):
+            data = self.model.entry(row)
             if data['type'] != 'single':
                 continue  # Solo agrupar sueltas
             paths.append(data['path'])
-            indices_to_remove.append(self.list_widget.row(item))
+            indices_to_remove.append(row)
 
         if not paths:
             return
@@ -338,31 +425,21 @@ class MainWindow(QMainWindow):
         group_name = f"Grupo_{len(self.group_handler.groups) + 1}"
         group = self.group_handler.create_group(paths, group_name)
 
-        # Agregar item para grupo
-        group_item = QListWidgetItem(f"Grupo: {group_name} [{len(paths)} imgs]")
-        group_item.setToolTip("\n".join(paths))  # Tooltip con paths
-        group_item.setData(Qt.ItemDataRole.UserRole, {'type': 'group', 'group': group})
-        group_item.setBackground(QBrush(group['color']))  # Color para diferenciar
-        self.list_widget.addItem(group_item)
-
-        # Remover sueltas seleccionadas (en reversa para indices)
-        for idx in sorted(indices_to_remove, reverse=True):
-            path = self.list_widget.item(idx).data(Qt.ItemDataRole.UserRole)['path']
-            self.loader.remove_path(path)
-            self.list_widget.takeItem(idx)
+        # Agregar fila para el grupo y quitar las sueltas seleccionadas en bloque
+        self.model.append_group(group)
+        self.loader.remove_paths(paths)
+        self.model.remove_rows(indices_to_remove)
 
         # Seleccionar el nuevo grupo
-        self.list_widget.setCurrentItem(group_item)
-        self._show_index(self.list_widget.row(group_item))
+        self._show_index(self.model.row_of(id(group)))
 
 
     # Desagrupar
     def ungroup_current(self):
-        idx = self.list_widget.currentRow()
+        idx = self._current_row()
         if idx < 0:
             return
-        item = self.list_widget.item(idx)
-        data = item.data(Qt.ItemDataRole.UserRole)
+        data = self.model.entry(idx)
         if data['type'] != 'group':
             QMessageBox.warning(self, "Selección", "Selecciona un grupo para desagrupar.")
             return
@@ -374,23 +451,21 @@ class MainWindow(QMainWindow):
         group = data['group']
         paths = group['paths']
         self.group_handler.remove_group(group)
-        self.list_widget.takeItem(idx)
+        self.model.remove_rows([idx])
 
         # Agregar de vuelta como sueltas
-        self.loader._add_paths(paths)  # Re-agregar a loader
-        self._append_list_items(paths)  # Re-agregar a lista
+        self._append_list_items(self.loader.add_ungrouped_paths(paths))
 
-        if self.list_widget.count() > 0:
+        if self.model.rowCount() > 0:
             self._show_index(0)
 
     # Eliminar Imagen
     def delete_current(self):
-        idx = self.list_widget.currentRow()
+        idx = self._current_row()
         if idx < 0:
             return
 
-        item = self.list_widget.item(idx)
-        data = item.data(Qt.ItemDataRole.UserRole)
+        data = self.model.entry(idx)
         msg = "esta imagen" if data['type'] == 'single' else "este grupo (y sus imágenes)"
 
         reply = QMessageBox.question(self, "Confirmar eliminación", f"¿Eliminar {msg}?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
@@ -403,36 +478,119 @@ class MainWindow(QMainWindow):
         elif data['type'] == 'group':
             self.group_handler.remove_group(data['group'])
 
-        self.list_widget.takeItem(idx)
+        self.duplicates.remove_paths(self.model.paths_of([idx]))
+        self.model.remove_rows([idx])
 
-        if self.list_widget.count() > 0:
-            new_idx = min(idx, self.list_widget.count() - 1)
+        if self.model.rowCount() > 0:
+            new_idx = min(idx, self.model.rowCount() - 1)
             self._show_index(new_idx)
         else:
             self.viewer.set_image(None)
             self.rename_panel.set_name("")
 
+    # Nueva sesión
+    def new_session(self):
+        if self.model.rowCount():
+            reply = QMessageBox.question(
+                self, "Nueva sesión",
+                f"¿Quitar las {self.model.rowCount()} filas de la lista y empezar una sesión nueva?\n"
+                "Los archivos no se borran.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+        if self._scan_worker is not None:
+            self._scan_worker.cancel()
+        self.loader.clear()
+        self.group_handler.clear()
+        self.viewer.editor.clear_edits()
+        self.duplicates.clear()
+        self.session.clear()
+        self.model.clear()
+        self.viewer.set_image(None)
+        self.rename_panel.set_name("")
+
     def auto_crop_current(self):
-        idx = self.list_widget.currentRow()
+        idx = self._current_row()
         if idx < 0:
             return
-        item = self.list_widget.item(idx)
-        data = item.data(Qt.ItemDataRole.UserRole)
+        data = self.model.entry(idx)
         if data['type'] != 'single':
             QMessageBox.warning(self, "Selección", "El recorte automático solo funciona en imágenes individuales.")
             return
 
         path = data['path']
         try:
-            current_img = self.viewer.editor.get_current_image(path)
-            cropped = auto_crop_document(current_img)
-            if cropped is None:
+            # Detecta sobre un proxy reducido (resultado cacheado); el warp se hace al exportar
+            if not self.viewer.editor.auto_crop(path):
                 QMessageBox.information(self, "Información", "No se detectó un documento para recortar automáticamente.")
                 return
-            self.viewer.editor.set_edited(path, cropped)
-            self.viewer.editor.rotations[path] = 0  # Resetear rotación (ya "horneada" en la editada)
             self.viewer.refresh()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Fallo en recorte automático: {str(e)}")
 
-    
\ No newline at end of file
+    # Recorte automático en lote
+    def auto_crop_selection(self):
+        self._run_batch_crop(self.model.paths_of(sorted(self._selected_rows())))
+
+    def auto_crop_all(self):
+        self._run_batch_crop(self.model.paths_of(range(self.model.rowCount())))
+
+    def _run_batch_crop(self, paths):
+        if not paths:
+            QMessageBox.warning(self, "Selección", "No hay imágenes para recortar.")
+            return
+
+        from core.batch_crop import build_crop_tasks
+        from ui.crop_worker import CropWorker
+        tasks = build_crop_tasks(self.viewer.editor, paths)
+        total = len(tasks)
+
+        progress = QProgressDialog("Recortando...", "Cancelar", 0, total, self)
+        progress.setWindowTitle("Recorte automático")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setValue(0)
+        progress.show()
+
+        worker = CropWorker(tasks, self.pool_workers, self)
+        worker.cropped.connect(self._on_batch_cropped)
+        worker.progress.connect(
+            lambda done, path: (progress.setValue(done), progress.setLabelText(f"Recortado {done}/{total}: {self.loader.get_name(path)}"))
+        )
+        progress.canceled.connect(worker.cancel)
+        progress.canceled.connect(lambda: progress.setLabelText("Cancelando..."))
+        worker.finished.connect(lambda: self._on_batch_crop_finished(worker, progress))
+        self._crop_worker = worker  # Mantener referencia mientras corre
+        worker.start()
+
+    def _on_batch_cropped(self, path, edits):
+        self.viewer.editor.set_edits(path, edits)
+        if path == self.viewer.current_path:
+            self.viewer.refresh()
+
+    def _on_batch_crop_finished(self, worker, progress):
+        cancelled = worker.cancelled  # Leer antes de close(): cerrar el diálogo emite canceled
+        progress.canceled.disconnect()
+        progress.close()
+        self._crop_worker = None
+
+        lines = []
+        if worker.not_detected:
+            names = [self.loader.get_name(p) for p in worker.not_detected]
+            lines.append(f"No se detectó documento en {len(names)} imágenes:")
+            lines.extend(names[:20])
+            if len(names) > 20:
+                lines.append(f"... y {len(names) - 20} más")
+        if worker.skipped:
+            lines.append(f"{len(worker.skipped)} imágenes ya estaban recortadas y no se tocaron.")
+        if worker.errors:
+            lines.append("Errores:")
+            lines.extend(worker.errors[:10])
+        if cancelled:
+            lines.insert(0, "Recorte cancelado.")
+
+        if lines:
+            QMessageBox.information(self, "Recorte automático", "\n".join(lines))
+        else:
+            QMessageBox.information(self, "Recorte automático", "Todas las imágenes fueron recortadas.")
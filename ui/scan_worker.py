@@ -0,0 +1,43 @@
+# ui/scan_worker.py
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.folder_scan import scan_folder
+from core.pages import expand_pages
+
+
+class ScanWorker(QThread):
+    """
+    Hilo que recorre carpetas y entrega las imágenes encontradas a la GUI por lotes.
+    Los TIFF/PDF se abren aquí para contar sus páginas: los lotes ya llegan expandidos.
+    """
+    batch_found = pyqtSignal(list)  # rutas del lote, una por página
+    progress = pyqtSignal(int)      # páginas encontradas hasta ahora
+
+    def __init__(self, folders: list[str], recursive: bool = True, parent=None):
+        super().__init__(parent)
+        self.folders = folders  # Se pueden añadir carpetas mientras corre
+        self.recursive = recursive
+        self.found = 0
+        self.scanned = 0  # Carpetas raíz ya recorridas
+        self._cancel = False
+
+    def run(self):
+        while self.scanned < len(self.folders) and not self._cancel:
+            folder = self.folders[self.scanned]
+            for batch in scan_folder(folder, self.recursive, cancelled=lambda: self._cancel):
+                batch = expand_pages(batch)
+                self.found += len(batch)
+                self.batch_found.emit(batch)
+                self.progress.emit(self.found)
+            self.scanned += 1
+
+    @property
+    def pending(self) -> list[str]:
+        """Carpetas añadidas que el hilo no llegó a recorrer."""
+        return [] if self._cancel else self.folders[self.scanned:]
+
+    def cancel(self):
+        self._cancel = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel
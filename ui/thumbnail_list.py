@@ -0,0 +1,146 @@
+# ui/thumbnail_list.py
+from PyQt6.QtWidgets import QListView
+from PyQt6.QtCore import QTimer, QSize, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QIcon, QPixmap
+from core.thumbnail_cache import ThumbnailCache, THUMB_SIZE
+
+SCROLL_DEBOUNCE_MS = 50  # Espera tras el último scroll antes de pedir miniaturas
+KEEP_MARGIN = 100        # Filas fuera de pantalla que conservan su icono
+
+
+class _ThumbSignals(QObject):
+    done = pyqtSignal(str, int, QImage, QImage)  # ruta, generación, miniatura del original, con las ediciones
+
+
+class _ThumbJob(QRunnable):
+    """
+    Carga la miniatura del disco (o la genera con decode reducido) y le aplica el plan de
+    ediciones de la página (recorte, filtros, giro), fuera del hilo GUI. Las páginas recortadas
+    se decodifican de nuevo a la escala justa para que el recorte llene la miniatura.
+    """
+
+    def __init__(self, cache, path, generation, raw, editor, plan):
+        super().__init__()
+        self.cache = cache
+        self.path = path
+        self.generation = generation
+        self.raw = raw  # Miniatura del original ya cargada, o None
+        self.editor = editor
+        self.plan = plan
+        self.signals = _ThumbSignals()
+
+    def run(self):
+        raw = self.raw if self.raw is not None else self.cache.get(self.path)
+        image = raw
+        if self.plan is None or raw.isNull():
+            pass
+        elif self.plan['quad'] is not None:
+            image = self.editor.render_preview_image(self.path, QSize(THUMB_SIZE, THUMB_SIZE), self.plan)
+        else:
+            image = self.editor.render_plan(raw, self.plan)
+        self.signals.done.emit(self.path, self.generation, raw, image)
+
+
+class ThumbnailList(QListView):
+    """
+    Vista de un DocumentModel con miniaturas. Solo se piden las de las filas visibles; las lejanas
+    sueltan su icono para que la memoria no crezca con el número de imágenes.
+    """
+
+    def __init__(self, editor=None, cache: ThumbnailCache | None = None, parent=None):
+        super().__init__(parent)
+        self.editor = editor  # Para mostrar las miniaturas con las ediciones de cada página
+        self.cache = cache or ThumbnailCache()
+        self._raw = {}         # {ruta: QImage} miniaturas del original de las filas cercanas
+        self._thumbs = {}      # {ruta: QImage} las mismas con recorte, filtros y giro aplicados
+        self._pending = {}     # {ruta: generación} del trabajo en cola; los resultados de otra se descartan
+        self._generation = 0
+        self._jobs = set()
+        self._pool = QThreadPool(self)  # Propio: no compite con el render del visor
+
+        self.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self.setUniformItemSizes(True)  # Layout O(1) por fila con miles de ítems
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SCROLL_DEBOUNCE_MS)
+        self._timer.timeout.connect(self.update_visible)
+        self.verticalScrollBar().valueChanged.connect(self._timer.start)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.rowsInserted.connect(self._timer.start)
+        model.rowsRemoved.connect(self._timer.start)
+        model.modelReset.connect(self._timer.start)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._timer.start()
+
+    def _visible_rows(self) -> range:
+        count = self.model().rowCount()
+        if not count:
+            return range(0)
+        viewport = self.viewport().rect()
+        first = self.indexAt(viewport.topLeft()).row()
+        last = self.indexAt(viewport.bottomLeft()).row()
+        first = max(first, 0)
+        last = count - 1 if last < 0 else last
+        return range(first, last + 1)
+
+    def update_visible(self):
+        """Pide las miniaturas de las filas visibles y suelta las que quedan lejos."""
+        model = self.model()
+        rows = self._visible_rows()
+        near = range(max(0, rows.start - KEEP_MARGIN), min(model.rowCount(), rows.stop + KEEP_MARGIN))
+        keep_keys = {model.key_of(model.entry(row)) for row in near}
+        keep = {model.path_of(row) for row in near}
+        for key in model.icon_keys():
+            if key not in keep_keys:
+                model.set_icon(key, None)
+        self._thumbs = {p: img for p, img in self._thumbs.items() if p in keep}
+        self._raw = {p: img for p, img in self._raw.items() if p in keep}
+
+        iconed = set(model.icon_keys())
+        for row in rows:
+            path = model.path_of(row)
+            if not path:
+                continue
+            if path in self._thumbs:
+                if model.key_of(model.entry(row)) not in iconed:
+                    self._set_icon(row, path)
+            elif path not in self._pending:
+                self._request(path)
+
+    def _request(self, path: str):
+        """Encola la miniatura de path con el plan de ediciones actual (leído aquí, en el hilo GUI)."""
+        self._generation += 1
+        self._pending[path] = self._generation
+        plan = self.editor.plan(path) if self.editor is not None else None
+        job = _ThumbJob(self.cache, path, self._generation, self._raw.get(path), self.editor, plan)
+        job.signals.done.connect(self._on_thumb_ready)
+        self._jobs.add(job)
+        self._pool.start(job)
+
+    def _on_thumb_ready(self, path, generation, raw, img):
+        if self._pending.get(path) != generation:
+            return  # Las ediciones cambiaron mientras se generaba: ya hay otro trabajo en cola
+        del self._pending[path]
+        self._jobs = {j for j in self._jobs if self._pending.get(j.path) == j.generation}
+        if img.isNull():
+            return
+        self._raw[path] = raw
+        self._thumbs[path] = img
+        for row in self._visible_rows():
+            if self.model().path_of(row) == path:
+                self._set_icon(row, path)
+
+    def _set_icon(self, row, path):
+        model = self.model()
+        model.set_icon(model.key_of(model.entry(row)), QIcon(QPixmap.fromImage(self._thumbs[path])))
+
+    def refresh_thumbnail(self, path: str):
+        """Vuelve a generar la miniatura de una ruta tras cambiar sus ediciones (giro, recorte, filtros)."""
+        if path not in self._thumbs and path not in self._pending:
+            return  # Sin miniatura cargada: se generará con el plan nuevo al hacerse visible
+        self._request(path)  # El icono actual se queda hasta que llegue el nuevo